@@ -12,17 +12,34 @@ import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 import xml.etree.ElementTree as ET
+import io
+from urllib.parse import quote, urlencode
+from xml.sax.saxutils import escape, quoteattr
 import json
+import hashlib
+import itertools
+import functools
+import operator
 import webbrowser
 import logging
-import xml.dom.minidom
-from logging.handlers import RotatingFileHandler
-from AppKit import NSAlert, NSImage, NSApplicationActivateIgnoringOtherApps
-from Foundation import NSURL
+import queue
+import atexit
+from collections import OrderedDict
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+from AppKit import (
+    NSApp, NSAlert, NSApplicationActivateIgnoringOtherApps, NSColor, NSFont,
+    NSForegroundColorAttributeName, NSImage, NSMakeRect, NSMakeSize, NSPasteboard,
+    NSPasteboardTypeString, NSPopUpButton, NSScrollView, NSSecureTextField, NSSize,
+    NSTabView, NSTabViewItem, NSTextField, NSTextView, NSView,
+)
+from Foundation import NSURL, NSObject
+from PyObjCTools import AppHelper
 import objc
+import urllib3
 from urllib3.exceptions import InsecureRequestWarning, NotOpenSSLWarning
-warnings.simplefilter("ignore", InsecureRequestWarning)
-from concurrent.futures import ThreadPoolExecutor
+urllib3.disable_warnings(InsecureRequestWarning)
+warnings.simplefilter("ignore", NotOpenSSLWarning)
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 import threading
 import time
 from typing import Optional
@@ -35,10 +52,38 @@ except ImportError:
     KEYRING_AVAILABLE = False
     print("WARNING: keyring not available. Credentials will be stored less securely.")
 
+# Faster XML parsing (libxml2) when available; stdlib ElementTree otherwise
+try:
+    from lxml import etree as LET
+    LXML_AVAILABLE = True
+    # Compiled once; ElementTree's find()/findall() re-resolve their path on every call
+    _XP_ENTRY = LET.XPath(".//entry")
+    _XP_SYSTEM = LET.XPath(".//result/system")
+    # $n is bound at call time, so gateway/tunnel names are never spliced into the expression
+    _XP_IKE_BY_NAME = LET.XPath(
+        ".//entry[normalize-space(gateway)=normalize-space($n)"
+        " or normalize-space(name)=normalize-space($n) or normalize-space(@name)=normalize-space($n)]"
+    )
+    _XP_IPSEC_BY_NAME = LET.XPath(
+        ".//entry[normalize-space(tunnel)=normalize-space($n)"
+        " or normalize-space(name)=normalize-space($n) or normalize-space(@name)=normalize-space($n)]"
+    )
+except ImportError:
+    LET = None
+    LXML_AVAILABLE = False
+    _XP_ENTRY = _XP_SYSTEM = _XP_IKE_BY_NAME = _XP_IPSEC_BY_NAME = None
+
 ICON_FILENAME = "pan-logo-1.png"
 VERSION = "v2.0 Secure"
 BUNDLE_ID = "com.yourcompany.panoramatools"
 KEYRING_SERVICE = "PanoramaTools"
+HL_MAX_CHARS = 200_000  # popups larger than this are shown as plain text
+PRETTY_CACHE_SIZE = 32  # pretty-printed popup payloads kept in memory
+EXECUTOR_WORKERS = 16  # shared background pool (fetches, override sweeps, CLI, pushes)
+# Keep-alive connections to Panorama: one per worker plus headroom for main-thread requests
+HTTP_POOL_SIZE = EXECUTOR_WORKERS + 4
+# Override checks in flight at once; the other workers stay free for fetches, CLI and pushes
+OVERRIDE_SWEEP_WORKERS = EXECUTOR_WORKERS // 2
 
 # Determine if running as bundled app or script
 if getattr(sys, 'frozen', False):
@@ -63,21 +108,214 @@ else:
     WORK_DIR = os.getcwd()
     LOCK_FILE = os.path.join(os.getcwd(), "panorama_tools.lock")
 
+# The icon ships with the app and does not come and go at runtime; probe it once
+ICON_EXISTS = os.path.exists(ICON_PATH)
+
 # Setup rotating logging for CLI debug
 log_formatter = logging.Formatter("%(asctime)s [%(levelname)s] %(message)s")
-cli_handler = RotatingFileHandler(CLI_LOG_FILE, maxBytes=10*1024*1024, backupCount=5)
+cli_handler = RotatingFileHandler(CLI_LOG_FILE, maxBytes=50*1024*1024, backupCount=3)
 cli_handler.setFormatter(log_formatter)
 
+# Callers only enqueue records; file writes and rotation happen on the listener thread
+log_queue = queue.Queue(-1)
+log_listener = QueueListener(log_queue, cli_handler, respect_handler_level=True)
+log_listener.start()
+atexit.register(log_listener.stop)
+
+# DEBUG records (urllib3 connection chatter etc.) only when PAN_DEBUG=1
 root_logger = logging.getLogger()
-root_logger.setLevel(logging.DEBUG)
-root_logger.addHandler(cli_handler)
+root_logger.setLevel(logging.DEBUG if os.environ.get("PAN_DEBUG") == "1" else logging.INFO)
+root_logger.addHandler(QueueHandler(log_queue))
+
+# Per-firewall running /network dumps during bulk override checks only when PAN_DEBUG_DUMPS=1
+DEBUG_DUMPS = os.environ.get("PAN_DEBUG_DUMPS") == "1"
 
 logging.captureWarnings(True)
 
+# Application log written by PanoramaSyncMonitor.log(); built once, not per message
+app_handler = RotatingFileHandler(LOG_FILE, maxBytes=10*1024*1024, backupCount=5)
+app_handler.setFormatter(log_formatter)
+app_logger = logging.getLogger("PanoramaSync")
+app_logger.addHandler(app_handler)
+app_logger.setLevel(logging.INFO)
+
+# Syntax highlighting patterns for the Raw XML tabs; one alternation tokenizes the document
+_XML_TOKEN_RE = re.compile(
+    r"(?P<comment><!--.*?-->)|(?P<tag></?(?P<name>[A-Za-z_][\w:.-]*)(?P<inner>[^>]*)>)|(?P<err>\berror\b)",
+    re.DOTALL | re.IGNORECASE,
+)
+_XML_ATTR_RE = re.compile(r"([A-Za-z_][\w:.-]*)(\s*=\s*)\"([^\"]*)\"")
+_ERROR_WORD_RE = re.compile(r"\berror\b", re.IGNORECASE)
+# "key:" prefix of each Human Readable line, up to its first colon
+_HUMAN_KEY_RE = re.compile(r"^[^\n:]+:", re.MULTILINE)
+# CLI words allowed as op-XML tag names: an XML name start, then name characters. Anything
+# else (IPs, -flags, <, >, quotes, &) sends the command down the raw <cli> path instead
+_TOKEN_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_.-]*")
+# URL query values redacted by _sanitize_log
+_KEY_PARAM_RE = re.compile(r"key=[^&\s]+")
+_PASSWORD_PARAM_RE = re.compile(r"password=[^&\s]+")
+
+# Tried in order; the first field present on a device entry gives its connection state
+_CONNECTED_FIELDS = ("connected", "connection-status", "connected-to-panorama", "ha/peer/connected")
+_CONNECTED_TRUTHY = frozenset({"yes", "true", "connected", "up", "1"})
+# One shared object per status icon across every menu row and _fw_base tuple
+_ICON_GREEN = sys.intern("🟢")
+_ICON_RED = sys.intern("🔴")
+_ICON_YELLOW = sys.intern("🟡")
+_SYNC_ICON = {"in sync": _ICON_GREEN, "out of sync": _ICON_RED}
+
+_IKE_HEADERS = ("Gateway", "State", "Version", "Local IP", "Peer IP", "Established/Created")
+_IPSEC_HEADERS = ("Tunnel", "State", "Enc", "Auth", "SPI In", "SPI Out", "Bytes In", "Bytes Out")
+
+
+def _is_meaningful_text(text):
+    """True for non-blank element text; isspace() scans without allocating a stripped copy."""
+    return bool(text) and not text.isspace()
+
+
+def _child_texts(elem):
+    """Map each child tag to its stripped text; the first child wins, as with findtext()."""
+    fields = {}
+    for c in elem:
+        if c.tag not in fields:
+            fields[c.tag] = (c.text or "").strip()
+    return fields
+
+
+def _render_table(headers, rows):
+    """Left-aligned text table written straight into one buffer.
+
+    Widths come from the transposed columns (max(map(len, col)) per column),
+    then every line is formatted once into a StringIO."""
+    cols = list(zip(*rows)) if rows else [()] * len(headers)
+    widths = [max(len(h), max(map(len, col), default=0)) for h, col in zip(headers, cols)]
+    fmt = " ".join(f"{{:<{w}}}" for w in widths)
+    buf = io.StringIO()
+    buf.write(fmt.format(*headers))
+    buf.write("\n")
+    buf.write("-" * (sum(widths) + len(widths) - 1))
+    for r in rows:
+        buf.write("\n")
+        buf.write(fmt.format(*r))
+    return buf.getvalue()
+
+
+def _drop_sender(fn, args, _sender):
+    return fn(*args)
+
+
+def _menu_cb(fn, *args):
+    """rumps callback that ignores the sender and calls fn(*args); a partial, not a closure."""
+    return functools.partial(_drop_sender, fn, args)
+
+
+_xml_tls = threading.local()
+
+
+def _lxml_parser():
+    """This thread's reusable lxml parser; entities stay unexpanded and libxml2's size limits stay on."""
+    parser = getattr(_xml_tls, "parser", None)
+    if parser is None:
+        parser = _xml_tls.parser = LET.XMLParser(resolve_entities=False)
+    return parser
+
+
+def _iterparse(raw, events):
+    """Incrementally parse an XML byte string; under lxml entities stay unexpanded, as in _lxml_parser."""
+    if LXML_AVAILABLE:
+        return LET.iterparse(io.BytesIO(raw), events=events, resolve_entities=False)
+    return ET.iterparse(io.BytesIO(raw), events=events)
+
+
+def _xml_entries(root):
+    """Every <entry> below root, through the compiled XPath when root is an lxml element."""
+    if _XP_ENTRY is not None and LET.iselement(root):
+        return _XP_ENTRY(root)
+    return root.findall(".//entry")
+
+
+def _xml_entries_named(root, xp, name):
+    """<entry> elements that may be called name; a superset the caller still checks exactly.
+
+    Under lxml the compiled xp filters inside libxml2; ElementTree returns every entry."""
+    if xp is not None and LET.iselement(root):
+        return xp(root, n=name)
+    return _xml_entries(root)
+
+
+def _xml_system(root):
+    """The first result/system element below root, or None."""
+    if _XP_SYSTEM is not None and LET.iselement(root):
+        found = _XP_SYSTEM(root)
+        return found[0] if found else None
+    return root.find(".//result/system")
+
+
+def _entry_line(entry):
+    """One 'tag: text | tag: text' line for an <entry>'s children."""
+    return " | ".join(f"{child.tag}: {(child.text or '').strip()}" for child in entry)
+
+
+def _result_section_lines(raw, section):
+    """Stream _entry_line() for each <entry> directly under result/<section>.
+
+    Entries are cleared as soon as they are formatted, so memory stays bounded by
+    one entry. Returns None when the response has no such section."""
+    if not isinstance(raw, (bytes, bytearray)):
+        raw = (raw or "").encode("utf-8")
+    path = []
+    found = False
+    lines = []
+    for event, elem in _iterparse(raw, ("start", "end")):
+        if event == "start":
+            path.append(elem.tag)
+            if elem.tag == section and len(path) >= 2 and path[-2] == "result":
+                found = True
+            continue
+        path.pop()
+        if elem.tag == "entry" and len(path) >= 2 and path[-1] == section and path[-2] == "result":
+            lines.append(_entry_line(elem))
+            elem.clear()
+    return lines if found else None
+
+
+@functools.lru_cache(maxsize=256)
+def _quoted_op(xml_cmd):
+    """Percent-encoded cmd= value; the fixed op commands are encoded once per process."""
+    return quote(xml_cmd, safe="")
+
+
+def _first_element_text(raw, tag):
+    """Return the text of the first <tag> in an XML byte string, stopping the parse there."""
+    for _, elem in _iterparse(raw, ("end",)):
+        if elem.tag == tag:
+            return elem.text
+        elem.clear()
+    return None
+
+
+class _TabHighlightDelegate(NSObject):
+    """NSTabView delegate that runs a tab's highlighting the first time the tab is shown."""
+
+    def initWithPending_(self, pending):
+        self = objc.super(_TabHighlightDelegate, self).init()
+        if self is None:
+            return None
+        self.pending = pending
+        return self
+
+    def highlightItem_(self, item):
+        job = self.pending.pop(item.identifier(), None) if item is not None else None
+        if job:
+            job()
+
+    def tabView_didSelectTabViewItem_(self, tab_view, item):
+        self.highlightItem_(item)
+
 
 class PanoramaSyncMonitor(rumps.App):
     def __init__(self, name="Panorama Tools"):
-        app_icon = ICON_PATH if os.path.exists(ICON_PATH) else None
+        app_icon = ICON_PATH if ICON_EXISTS else None
         super().__init__(name="Panorama Tools", icon=app_icon, quit_button=None)
         
         # Ensure the menu bar item appears even if the icon file is missing
@@ -101,22 +339,54 @@ class PanoramaSyncMonitor(rumps.App):
         self.verify_ssl = False  # Default to INSECURE (user request); re-enable in SSL Settings
         self.custom_ca_path = None
         self._override_cache = {}
+        self._running_net_xml = {}
         self._fw_items = {}
         self._fw_base = {}
-        self._executor = ThreadPoolExecutor(max_workers=6)
+        self._fw_titles = {}
+        self._fw_rows = []  # (serial, icon, hostname, item), kept in menu order
+        self._fw_menu_stale = False
+        self._menu_dirty = False
+        self._menu_refresh_pending = False
+        # Shared by all background work; HTTP_POOL_SIZE is derived from it so every worker keeps a connection
+        self._executor = ThreadPoolExecutor(max_workers=EXECUTOR_WORKERS, thread_name_prefix="pan")
+        # One writer keeps raw XML dumps ordered and off the fetch path
+        self._log_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pan-log")
         self._ui_update_lock = threading.Lock()
-        self._pending_timers = set()
+        self._main_ident = threading.main_thread().ident
+        self._hl_palette = None
+        self._pretty_cache = OrderedDict()  # blake2b(raw) -> pretty text, LRU
+        self._pretty_lock = threading.Lock()
+        self._custom_cmds_cache = (None, None)  # (st_mtime_ns, parsed CUSTOM_CMDS_FILE)
+        # Known CLI spellings -> (op XML, humanizer); every alias shares one tuple
+        self._cli_dispatch = {}
+        for aliases, xml_cmd, humanizer in (
+            (("show interface all",),
+             "<show><interface>all</interface></show>", self._humanize_interfaces),
+            (("show arp all",),
+             "<show><arp><entry name='all'/></arp></show>", self._humanize_arp),
+            (("show vpn ike-sa", "show vpn ike sa", "show ike gw", "show ike gateway"),
+             "<show><vpn><ike-sa></ike-sa></vpn></show>", self._humanize_ike_summary),
+            (("show vpn ipsec-sa", "show vpn ipsec sa", "show ipsec tunnel", "show ipsec tunnels"),
+             "<show><vpn><ipsec-sa></ipsec-sa></vpn></show>", self._humanize_ipsec_summary),
+            (("show routing protocol bgp summary", "show bgp summary"),
+             "<show><routing><protocol><bgp><summary></summary></bgp></protocol></routing></show>", None),
+        ):
+            entry = (xml_cmd, humanizer)
+            for alias in aliases:
+                self._cli_dispatch[alias] = entry
+        self._icon_img = None  # decoded ICON_PATH, shared by every alert
 
         # Reuse HTTP connections for speed (keep-alive + connection pool)
         self._http = requests.Session()
         try:
             retry = Retry(total=3, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504))
-            adapter = HTTPAdapter(pool_connections=20, pool_maxsize=20, max_retries=retry)
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
             self._http.mount('http://', adapter)
             self._http.mount('https://', adapter)
         except Exception:
             pass
         self._http.headers.update({'Accept-Encoding': 'gzip, deflate'})
+        self._sync_session_verify()
 
         self.load_stored_login()
 
@@ -163,10 +433,9 @@ class PanoramaSyncMonitor(rumps.App):
         if self.panorama_url and self.username and self.api_key:
             try:
                 # Auto-fetch connected FWs, templates, and device groups shortly after startup
-                self._initial_fetch_timer = rumps.Timer(self._deferred_fetch_on_launch, 0.2)
-                self._initial_fetch_timer.start()
+                AppHelper.callLater(0.2, self._deferred_fetch_on_launch, None)
             except Exception as e:
-                logging.warning("Failed to start deferred fetch timer: %s", e)
+                logging.warning("Failed to schedule deferred fetch: %s", e)
 
     def _acquire_lock(self):
         """Ensure only one instance runs at a time"""
@@ -203,9 +472,11 @@ class PanoramaSyncMonitor(rumps.App):
             message = message.replace(self.api_key, "***REDACTED***")
         if self.password:
             message = message.replace(self.password, "***REDACTED***")
-        # Redact URL parameters that might contain keys
-        message = re.sub(r'key=[^&\s]+', 'key=***REDACTED***', message)
-        message = re.sub(r'password=[^&\s]+', 'password=***REDACTED***', message)
+        # Redact URL parameters that might contain keys; most lines carry neither
+        if "key=" in message:
+            message = _KEY_PARAM_RE.sub("key=***REDACTED***", message)
+        if "password=" in message:
+            message = _PASSWORD_PARAM_RE.sub("password=***REDACTED***", message)
         return message
 
     def _secure_file_permissions(self, filepath):
@@ -216,19 +487,37 @@ class PanoramaSyncMonitor(rumps.App):
         except Exception as e:
             self.log(f"Cannot set permissions on {filepath}: {e}")
 
-    def _make_request(self, url, timeout=10):
-        """Centralized request with SSL handling.
+    def _write_log_async(self, filename, data):
+        """Queue a raw response dump to WORK_DIR; the bytes are written as received, not re-encoded."""
+        path = os.path.join(WORK_DIR, filename)
 
-        If verify_ssl is False, silently allow insecure requests (no popup)."""
+        def write():
+            try:
+                with open(path, "wb") as f:
+                    f.write(data)
+                self._secure_file_permissions(path)
+            except Exception as e:
+                self.log(f"Cannot write {path}: {e}")
+
+        self._log_pool.submit(write)
+
+    def _sync_session_verify(self):
+        """Mirror the SSL settings onto the shared session so requests need no per-call verify."""
         verify = self.verify_ssl
         if self.custom_ca_path and os.path.exists(self.custom_ca_path):
             verify = self.custom_ca_path
-        if verify is False:
-            return self._http.get(url, verify=False, timeout=timeout)
+        self._http.verify = verify
+
+    def _make_request(self, url, timeout=10, stream=False, params=None):
+        """Centralized request with SSL handling.
+
+        If verify_ssl is False, silently allow insecure requests (no popup)."""
         try:
-            return self._http.get(url, verify=verify, timeout=timeout)
+            return self._http.get(url, params=params, timeout=timeout, stream=stream)
         except requests.exceptions.SSLError as e:
             self.log(f"SSL Error: {e}")
+            if threading.get_ident() != self._main_ident:
+                raise  # the "Allow Once" prompt is modal; background requests report the error instead
             response = rumps.alert(
                 title="SSL Certificate Error",
                 message="Cannot verify SSL certificate. Allow insecure connection this time?",
@@ -236,8 +525,22 @@ class PanoramaSyncMonitor(rumps.App):
                 cancel="Cancel"
             )
             if response == 1:
-                return self._http.get(url, verify=False, timeout=timeout)
+                return self._http.get(url, params=params, verify=False, timeout=timeout, stream=stream)
             raise
+
+    def _api_get(self, params, timeout=10, stream=False):
+        """GET the Panorama XML API with the key merged into params.
+
+        The query string is built here so the cmd XML comes pre-encoded from _quoted_op;
+        requests passes a string query through untouched."""
+        query = {"key": self.api_key}
+        query.update(params)
+        cmd = query.pop("cmd", None)
+        qs = urlencode(query)
+        if cmd is not None:
+            qs = f"{qs}&cmd={_quoted_op(cmd)}"
+        return self._make_request(f"https://{self.panorama_url}/api/", timeout=timeout, stream=stream, params=qs)
+
     def configure_ssl(self, _):
         """Configure SSL verification settings"""
         current = "Enabled" if self.verify_ssl else "Disabled"
@@ -253,12 +556,10 @@ class PanoramaSyncMonitor(rumps.App):
         alert.addButtonWithTitle_("Set Custom CA Path")
         alert.addButtonWithTitle_("Cancel")
         
-        if os.path.exists(ICON_PATH):
-            icon_image = NSImage.alloc().initWithContentsOfFile_(ICON_PATH)
-            if icon_image:
-                alert.setIcon_(icon_image)
+        icon_image = self._icon_image()
+        if icon_image:
+            alert.setIcon_(icon_image)
         
-        from AppKit import NSApp
         NSApp.activateIgnoringOtherApps_(True)
         resp = alert.runModal()
         
@@ -287,26 +588,25 @@ class PanoramaSyncMonitor(rumps.App):
                     rumps.alert(f"Custom CA set: {path}")
                 else:
                     rumps.alert("File not found. SSL settings unchanged.")
+        self._sync_session_verify()
 
     def cleanup(self, _):
         """Clean up resources before quitting"""
         try:
             self.log("Application shutting down...")
             
-            # Stop all timers
-            for timer in list(self._pending_timers):
-                try:
-                    timer.stop()
-                except:
-                    pass
-            self._pending_timers.clear()
-            
             # Shutdown executor
             self._executor.shutdown(wait=False)
+            # Let pending XML dumps land before exit
+            self._log_pool.shutdown(wait=True)
             
             # Close HTTP session
             self._http.close()
-            
+
+            # Flush queued log records; AppKit may exit without running atexit hooks
+            atexit.unregister(log_listener.stop)
+            log_listener.stop()
+
             # Release lock
             if hasattr(self, '_lock_fd'):
                 try:
@@ -327,28 +627,48 @@ class PanoramaSyncMonitor(rumps.App):
         finally:
             rumps.quit_application()
 
+    def _set_fw_title(self, serial, item, title):
+        """Assign a firewall item title only when it differs, marking the menu for re-add."""
+        if self._fw_titles.get(serial) == title:
+            return
+        item.title = title
+        self._fw_titles[serial] = title
+        self._fw_menu_stale = True
+
+    def _schedule_menu_refresh(self):
+        """Coalesce Firewalls/Local Overrides rebuilds into one pass shortly after the last change."""
+        self._menu_dirty = True
+        if self._menu_refresh_pending:
+            return
+        self._menu_refresh_pending = True
+        AppHelper.callLater(0.05, self._flush_menu_refresh)
+
+    def _flush_menu_refresh(self):
+        self._menu_refresh_pending = False
+        if self._menu_dirty:
+            self._menu_dirty = False
+            self._rebuild_firewalls_menu_icons()
+            self._rebuild_overrides_menu()
+
     def _rebuild_firewalls_menu_icons(self):
         """Rebuild Firewalls submenu titles so the ⚠️ icon displays reliably."""
         try:
             with self._ui_update_lock:
                 # Preserve items but reset titles from base + cache state
-                items = []
-                for serial, item in self._fw_items.items():
-                    base = self._fw_base.get(serial)
-                    if not base:
-                        continue
-                    icon, hostname = base
+                for serial, icon, hostname, item in self._fw_rows:
                     cached = self._override_cache.get(serial)
                     has_override = cached[0] if isinstance(cached, tuple) else bool(cached)
                     title = f"{icon}{' ⚠️' if has_override else ''} {hostname}"
-                    item.title = title
-                    items.append((hostname.lower(), item))
+                    self._set_fw_title(serial, item, title)
+                if not self._fw_menu_stale:
+                    return
 
                 # Clear and re-add to force UI refresh
+                self._fw_menu_stale = False
                 self.firewalls_menu.clear()
                 self.firewalls_menu.title = "Firewalls"
-                for _, it in sorted(items, key=lambda x: x[0]):
-                    self.firewalls_menu.add(it)
+                for row in self._fw_rows:
+                    self.firewalls_menu.add(row[3])
         except Exception as e:
             self.log(f"[override] rebuild firewalls menu failed: {e}")
 
@@ -365,7 +685,7 @@ class PanoramaSyncMonitor(rumps.App):
                     host = self._fw_base.get(serial, ("", serial))[1]
                     mi = rumps.MenuItem(f"⚠️ {host} ({serial})")
                     # allow quick drill-down
-                    mi.add(rumps.MenuItem("Check Local Overrides", callback=lambda _, s=serial: self._show_override_details(s)))
+                    mi.add(rumps.MenuItem("Check Local Overrides", callback=_menu_cb(self._show_override_details, serial)))
                     self.overrides_menu.add(mi)
                     added += 1
                 if added == 0:
@@ -373,165 +693,100 @@ class PanoramaSyncMonitor(rumps.App):
         except Exception as e:
             self.log(f"[override] rebuild overrides menu failed: {e}")
 
-    def _extract_network_subtree(self, xml_text):
-        """Return serialized XML of the <network> subtree if present, else empty string."""
-        try:
-            root = ET.fromstring(xml_text if xml_text else "")
-        except Exception:
-            return ""
-        # Try common locations
-        net_elem = root.find(".//config/devices/entry[@name='localhost.localdomain']/network")
-        if net_elem is None:
-            net_elem = root.find(".//devices/entry[@name='localhost.localdomain']/network")
-        if net_elem is None:
-            net_elem = root.find(".//network")
-        if net_elem is None:
-            return ""
-        try:
-            return ET.tostring(net_elem, encoding="unicode")
-        except Exception:
-            return ""
+    def _parse_xml(self, xml_text):
+        """Parse XML text or bytes, using lxml when installed."""
+        raw = xml_text if isinstance(xml_text, (bytes, bytearray)) else (xml_text or "").encode("utf-8")
+        if LXML_AVAILABLE:
+            return LET.fromstring(raw, _lxml_parser())
+        return ET.fromstring(raw)
 
-    def _xml_path(self, elem):
-        try:
-            parts = []
-            cur = elem
-            while cur is not None and hasattr(cur, 'tag'):
-                tag = cur.tag
-                name = cur.attrib.get('name')
-                parts.append(f"{tag}[@name='{name}']" if name else tag)
-                cur = cur.getparent() if hasattr(cur, 'getparent') else None
-            parts = list(reversed(parts))
-            return '/' + '/'.join(parts) if parts else '(no-path)'
-        except Exception:
-            return '(path-unavailable)'
+    def _xml_tostring(self, elem):
+        """Serialize an element parsed by _parse_xml back to a string."""
+        if LXML_AVAILABLE and LET.iselement(elem):
+            return LET.tostring(elem, encoding="unicode")
+        return ET.tostring(elem, encoding="unicode")
 
     def _find_meaningful_nodes(self, net_elem, limit=10):
         """Return a list of up to `limit` nodes under <network> considered 'meaningful' (attribs or text)."""
         hits = []
         if net_elem is None:
             return hits
-        count = 0
-        for e in net_elem.iter():
-            if e is net_elem:
-                continue
-            if e.attrib or (e.text and e.text.strip()):
-                name = e.attrib.get('name')
-                txt = (e.text or '').strip()
-                attr = f" name='{name}'" if name else ""
-                brief = f"<{e.tag}{attr}>"
-                if txt:
-                    brief += f" text='{txt[:60]}{'...' if len(txt)>60 else ''}'"
-                hits.append(brief)
-                count += 1
-                if count >= limit:
-                    break
+        # A lazy walk, so the scan ends at the limit-th hit; an XPath node-set is always built in full
+        meaningful = (
+            e for e in net_elem.iter()
+            if e is not net_elem and isinstance(e.tag, str)
+            and (e.attrib or _is_meaningful_text(e.text))
+        )
+        for e in itertools.islice(meaningful, limit):
+            name = e.attrib.get('name')
+            txt = (e.text or '').strip()
+            attr = f" name='{name}'" if name else ""
+            brief = f"<{e.tag}{attr}>"
+            if txt:
+                brief += f" text='{txt[:60]}{'...' if len(txt)>60 else ''}'"
+            hits.append(brief)
         return hits
 
-    def _has_meaningful_network_config(self, net_elem):
-        """Return True if there is real configuration under <network>."""
-        if net_elem is None:
-            return False
-        for e in net_elem.iter():
-            if e is net_elem:
-                continue
-            if e.attrib:
-                return True
-            if e.text and e.text.strip():
-                return True
-        return False
-
-    def _fetch_config_network(self, serial, which):
-        """Return XML text of the Network subtree for the device."""
-        try:
-            network_xp = "/config/devices/entry[@name='localhost.localdomain']/network"
-            if which == "running":
-                url = (
-                    f"https://{self.panorama_url}/api/?key={self.api_key}"
-                    f"&type=config&action=get&xpath={self._url_x(network_xp)}&target={serial}"
-                )
-                r = self._make_request(url, timeout=12)
-                return r.text
-            elif which == "pushed-template":
-                cmd = "&cmd=<show><config><pushed-template></pushed-template></config></show>"
-                url = f"https://{self.panorama_url}/api/?key={self.api_key}&type=op{cmd}&target={serial}"
-                r = self._make_request(url, timeout=12)
-                try:
-                    root = ET.fromstring(r.text)
-                    net_elem = root.find(
-                        ".//config/devices/entry[@name='localhost.localdomain']/network"
-                    )
-                    if net_elem is not None:
-                        return ET.tostring(net_elem, encoding="unicode")
-                    return r.text
-                except Exception:
-                    return r.text
-            else:
-                return None
-        except Exception as e:
-            self.log(f"[override] fetch network {which} failed: {e}")
-            return None
-
     def _deferred_fetch_on_launch(self, _):
         """On launch (or post-login), fetch all firewalls, templates, and device groups."""
-        try:
-            if self.panorama_url and self.api_key:
-                self.fetch_firewalls(None)
-                self.fetch_templates(None)
-                self.fetch_device_groups(None)
-        finally:
-            try:
-                if hasattr(self, "_initial_fetch_timer") and self._initial_fetch_timer:
-                    self._initial_fetch_timer.stop()
-            except Exception:
-                pass
-
-    def _on_main(self, fn, *args, **kwargs):
-        """Execute function on main thread."""
-        try:
-            if threading.current_thread().name == 'MainThread':
-                return fn(*args, **kwargs)
-        except Exception:
-            pass
+        if self.panorama_url and self.api_key:
+            self.fetch_firewalls(None)
+            self.fetch_templates(None)
+            self.fetch_device_groups(None)
 
-        def cb(_):
-            try:
-                fn(*args, **kwargs)
-            finally:
-                try:
-                    t = getattr(cb, '_timer_ref', None)
-                    if t:
-                        try:
-                            t.stop()
-                        except Exception:
-                            pass
-                        try:
-                            self._pending_timers.discard(t)
-                        except Exception:
-                            pass
-                except Exception:
-                    pass
+    def _fetch_running_network(self, serial):
+        """Stream the running config and return (serialized <network>, <network> element).
 
-        timer = rumps.Timer(cb, 0.01)
-        cb._timer_ref = timer
+        Parsing stops once the localhost.localdomain <network> closes, so the rest
+        of the config is never downloaded; finished siblings are cleared as we go.
+        Returns None when the request fails and ("", None) when there is no <network>."""
         try:
-            self._pending_timers.add(timer)
-        except Exception:
-            pass
-        timer.start()
+            cmd = "<show><config><running></running></config></show>"
+            r = self._api_get({"type": "op", "cmd": cmd, "target": serial}, timeout=8, stream=True)
+        except Exception as e:
+            self.log(f"[override] fetch running failed: {e}")
+            return None
 
-    def _fetch_config_xml(self, serial, which):
-        """Return XML text for firewall config via op cmd."""
+        first_net = None
+        first_elem = None
         try:
-            if which not in {"running", "pushed-template"}:
-                return None
-            cmd = f"&cmd=<show><config><{which}></{which}></config></show>"
-            url = f"https://{self.panorama_url}/api/?key={self.api_key}&type=op{cmd}&target={serial}"
-            r = self._make_request(url, timeout=8)
-            return r.text
+            r.raw.decode_content = True
+            if LXML_AVAILABLE:
+                # Only the running config can outgrow libxml2's default limits
+                events = LET.iterparse(
+                    r.raw, events=("start", "end"), huge_tree=True, resolve_entities=False
+                )
+            else:
+                events = ET.iterparse(r.raw, events=("start", "end"))
+            stack = []
+            net_depth = 0
+            for event, elem in events:
+                if event == "start":
+                    stack.append(elem)
+                    if elem.tag == "network":
+                        net_depth += 1
+                    continue
+                stack.pop()
+                if elem.tag == "network":
+                    net_depth -= 1
+                    if net_depth == 0:
+                        parent = stack[-1] if stack else None
+                        if (parent is not None and parent.tag == "entry"
+                                and parent.get("name") == "localhost.localdomain"):
+                            return self._xml_tostring(elem), elem
+                        if first_net is None:
+                            first_net, first_elem = self._xml_tostring(elem), elem
+                            continue  # keep the fallback <network> intact for the scan
+                if net_depth == 0:
+                    elem.clear()
+                    if stack:
+                        stack[-1].remove(elem)
+            return first_net or "", first_elem
         except Exception as e:
-            self.log(f"[override] fetch {which} failed: {e}")
-            return None
+            self.log(f"[override] parse running failed: {e}")
+            return first_net or "", first_elem
+        finally:
+            r.close()
 
     def _norm_serial(self, s):
         try:
@@ -539,124 +794,132 @@ class PanoramaSyncMonitor(rumps.App):
         except Exception:
             return str(s)
 
-    def _detect_local_override(self, serial):
-        """Detect if a firewall has local overrides by checking network configuration."""
-        serial = self._norm_serial(serial)
+    def _save_running_network(self, serial, running_net):
+        """Write the running /network XML for troubleshooting."""
+        try:
+            save_path = os.path.join(WORK_DIR, f"override_running_{serial}.xml")
+            with open(save_path, "w") as f:
+                f.write(running_net or "")
+            self._secure_file_permissions(save_path)
+        except Exception as e:
+            self.log(f"[override] write running network xml failed: {e}")
+
+    def _cache_override(self, serial, res, api_key=None):
+        """Record a detection result unless the session it was started under has logged out."""
+        if api_key is None or self.api_key == api_key:
+            self._override_cache[serial] = res
+        return res
+
+    def _detect_local_override(self, serial, save_disk=False, api_key=None):
+        """Detect if a firewall has local overrides by checking network configuration.
+
+        Expects a normalized serial. The running /network XML is kept in memory; it is
+        only written to disk when save_disk is set (the details popup), or during bulk checks
+        when PAN_DEBUG_DUMPS=1.
+        The bulk sweep passes its api_key so results landing after a logout are not cached."""
         if serial in self._override_cache:
+            if save_disk and serial in self._running_net_xml:
+                self._save_running_network(serial, self._running_net_xml[serial])
             return self._override_cache[serial]
 
         try:
             self.log(f"[override] Starting detection for {serial}")
 
-            running_full = self._fetch_config_xml(serial, "running")
-            if not running_full:
+            fetched = self._fetch_running_network(serial)
+            if fetched is None:
                 self.log(f"[override] No running config retrieved for {serial}")
-                res = (False, "No running config retrieved")
-                self._override_cache[serial] = res
-                return res
-
-            running_net = self._extract_network_subtree(running_full)
-
-            # Save for troubleshooting
-            try:
-                save_path = os.path.join(WORK_DIR, f"override_running_{serial}.xml")
-                with open(save_path, "w") as f:
-                    f.write(running_net or "")
-                self._secure_file_permissions(save_path)
-            except Exception as e2:
-                self.log(f"[override] write running network xml failed: {e2}")
-
-            def to_elem(xml_text):
-                try:
-                    return ET.fromstring(xml_text) if xml_text else None
-                except Exception:
-                    return None
-
-            run_elem = to_elem(running_net)
-            has_meaning = self._has_meaningful_network_config(run_elem)
-
-            if has_meaning:
-                hits = self._find_meaningful_nodes(run_elem, limit=5)
-                summary = "Running /network contains local config:\n- " + "\n- ".join(hits) if hits else "Running /network contains local config."
+                return self._cache_override(serial, (False, "No running config retrieved"), api_key)
+            running_net, run_elem = fetched
+
+            if api_key is None or self.api_key == api_key:
+                self._running_net_xml[serial] = running_net
+            if save_disk:
+                self._save_running_network(serial, running_net)
+            elif DEBUG_DUMPS:
+                self._write_log_async(f"override_running_{serial}.xml", running_net.encode("utf-8"))
+
+            if run_elem is None:
+                res = (False, "No <network> element in running config.")
+                self.log(f"[override] {serial}: No override - no network element")
+                return self._cache_override(serial, res, api_key)
+
+            # The streamed element is scanned directly; one pass both decides and collects hits
+            hits = self._find_meaningful_nodes(run_elem, limit=5)
+
+            if hits:
+                summary = "Running /network contains local config:\n- " + "\n- ".join(hits)
                 res = (True, summary)
                 self.log(f"[override] {serial}: LOCAL OVERRIDE DETECTED - {len(hits)} meaningful elements")
             else:
                 res = (False, "Running /network is empty (no local override).")
                 self.log(f"[override] {serial}: No override - empty network config")
 
-            self._override_cache[serial] = res
-            return res
+            return self._cache_override(serial, res, api_key)
 
         except Exception as e:
             self.log(f"[override] detection failed for {serial}: {e}")
-            res = (False, f"Detection error: {e}")
-            self._override_cache[serial] = res
-            return res
+            return self._cache_override(serial, (False, f"Detection error: {e}"), api_key)
 
     def _ensure_override_listed(self, serial, has_override):
-        """Ensure Local Overrides submenu reflects the given serial's state immediately."""
+        """Ensure Local Overrides submenu reflects the given (normalized) serial's state immediately."""
         try:
-            norm = self._norm_serial(serial)
             with self._ui_update_lock:
                 placeholders = [mi for mi in self.overrides_menu if getattr(mi, 'title', '') == 'None detected']
                 for mi in placeholders:
                     self.overrides_menu.remove(mi)
                 to_remove = []
                 for mi in self.overrides_menu:
-                    if f"({norm})" in getattr(mi, 'title', ''):
+                    if f"({serial})" in getattr(mi, 'title', ''):
                         to_remove.append(mi)
                 for mi in to_remove:
                     self.overrides_menu.remove(mi)
                 if has_override:
-                    host = self._fw_base.get(norm, ("", norm))[1]
-                    mi = rumps.MenuItem(f"⚠️ {host} ({norm})")
-                    mi.add(rumps.MenuItem("Check Local Overrides", callback=lambda _, s=norm: self._show_override_details(s)))
+                    host = self._fw_base.get(serial, ("", serial))[1]
+                    mi = rumps.MenuItem(f"⚠️ {host} ({serial})")
+                    mi.add(rumps.MenuItem("Check Local Overrides", callback=_menu_cb(self._show_override_details, serial)))
                     self.overrides_menu.add(mi)
                 if not list(self.overrides_menu):
                     self.overrides_menu.add(rumps.MenuItem("None detected"))
                 if hasattr(self.overrides_menu, 'update'):
                     self.overrides_menu.update()
-            try:
-                self._rebuild_overrides_menu()
-            except Exception:
-                pass
         except Exception as e:
             self.log(f"[override] ensure list failed for {serial}: {e}")
 
-    def _update_override_icon(self, serial, has_override):
-        """Update the override icon for a firewall in the UI."""
+    def _update_override_icon(self, serial, has_override, list_now=True):
+        """Update the override icon for a firewall (normalized serial) in the UI.
+
+        With list_now False the Local Overrides submenu is left to the coalesced rebuild."""
         try:
-            norm_serial = self._norm_serial(serial)
-            self.log(f"[override] Updating icon for {norm_serial}: has_override={has_override}")
+            self.log(f"[override] Updating icon for {serial}: has_override={has_override}")
 
-            item = self._fw_items.get(norm_serial)
-            base = self._fw_base.get(norm_serial)
+            item = self._fw_items.get(serial)
+            base = self._fw_base.get(serial)
 
             if not item:
-                self.log(f"[override] No menu item found for serial '{norm_serial}'")
+                self.log(f"[override] No menu item found for serial '{serial}'")
                 return
 
             if base:
                 icon, hostname = base
                 override_icon = " ⚠️" if has_override else ""
                 new_title = f"{icon}{override_icon} {hostname}"
-                self.log(f"[override] Setting title for {norm_serial}: '{new_title}'")
-                item.title = new_title
+                self.log(f"[override] Setting title for {serial}: '{new_title}'")
+                self._set_fw_title(serial, item, new_title)
             else:
                 clean_title = item.title.replace(" ⚠️", "").strip()
                 new_title = f"{clean_title} ⚠️" if has_override else clean_title
-                item.title = new_title
-                self.log(f"[override] Fallback title for {norm_serial}: '{new_title}'")
+                self._set_fw_title(serial, item, new_title)
+                self.log(f"[override] Fallback title for {serial}: '{new_title}'")
 
-            current_cache = self._override_cache.get(norm_serial)
+            current_cache = self._override_cache.get(serial)
             if isinstance(current_cache, tuple):
-                self._override_cache[norm_serial] = (has_override, current_cache[1])
+                self._override_cache[serial] = (has_override, current_cache[1])
             else:
-                self._override_cache[norm_serial] = (has_override, "Icon updated")
+                self._override_cache[serial] = (has_override, "Icon updated")
 
-            self._ensure_override_listed(norm_serial, has_override)
-            self._rebuild_firewalls_menu_icons()
-            self._rebuild_overrides_menu()
+            if list_now:
+                self._ensure_override_listed(serial, has_override)
+            self._schedule_menu_refresh()
 
         except Exception as e:
             self.log(f"[override] Error updating icon for {serial}: {e}")
@@ -676,8 +939,10 @@ class PanoramaSyncMonitor(rumps.App):
         try:
             self.log("[override] Starting bulk override check (fast, multi-threaded)")
             self._override_cache.clear()
+            self._running_net_xml.clear()
 
-            serials = list(self._fw_items.keys())
+            # Snapshot: the sweep thread iterates this while logout may clear _fw_items
+            serials = tuple(self._fw_items)
             if not serials:
                 self.log("[override] No firewalls to check.")
                 self._notify("Panorama Sync", "Override Check", "No firewalls loaded to check")
@@ -685,76 +950,100 @@ class PanoramaSyncMonitor(rumps.App):
 
             self._notify("Panorama Sync", "Override Check", f"Checking {len(serials)} firewalls…")
 
-            results = []
+            # Panorama can only proxy to connected firewalls; skip the rest without a request
+            offline = {s for s in serials if self._fw_base.get(s, ("", ""))[0] == _ICON_RED}
+            for s in offline:
+                self._override_cache[s] = (False, "Firewall not connected to Panorama; check skipped.")
+            if offline:
+                self.log(f"[override] Skipping {len(offline)} disconnected firewalls")
+                serials = [s for s in serials if s not in offline]
 
-            def worker(s):
-                try:
-                    has_override, summary = self._detect_local_override(s)
-                    return (s, has_override)
-                except Exception as e:
-                    self.log(f"[override] worker error for {s}: {e}")
-                    return (s, False)
-
-            max_workers = 12
-            with ThreadPoolExecutor(max_workers=max_workers) as pool:
-                futures = {pool.submit(worker, s): s for s in serials}
-                batch = []
-                for fut in futures:
-                    try:
-                        s, has_override = fut.result(timeout=40)
-                        results.append((s, has_override))
-                        batch.append((s, has_override))
-                        if len(batch) >= 10:
-                            upd = list(batch)
-                            batch.clear()
-                            def do_updates():
-                                for ss, hov in upd:
-                                    self._update_override_icon(ss, hov)
-                                self._rebuild_overrides_menu()
-                                self._rebuild_firewalls_menu_icons()
-                            self._on_main(do_updates)
-                    except Exception as e:
-                        s = futures[fut]
-                        self.log(f"[override] future error for {s}: {e}")
-
-                if batch:
-                    upd = list(batch)
-                    def do_updates_last():
-                        for ss, hov in upd:
-                            self._update_override_icon(ss, hov)
-                        self._rebuild_overrides_menu()
-                        self._rebuild_firewalls_menu_icons()
-                    self._on_main(do_updates_last)
-
-            override_count = sum(1 for _, hov in results if hov)
-            self.log(f"[override] Bulk check complete. Found {override_count} overrides")
-
-            if override_count > 0:
-                self._notify("Panorama Sync", "Override Check Complete", f"Found {override_count} firewalls with local overrides")
-            else:
-                self._notify("Panorama Sync", "Override Check Complete", "No local overrides detected")
+            # Waiting on the sweep happens off the UI thread so each batch can repaint the menus
+            threading.Thread(
+                target=self._collect_override_results, args=(serials, self.api_key),
+                name="pan-override", daemon=True,
+            ).start()
 
         except Exception as e:
             self.log(f"[override] bulk check error: {e}")
             rumps.alert(f"Override check failed: {e}")
 
+    def _collect_override_results(self, serials, api_key):
+        """Sweep thread: run detections on the executor, posting results to the UI in batches of 10.
+
+        Only OVERRIDE_SWEEP_WORKERS detections are queued at a time, refilled as each one finishes.
+        A logout (api_key changed) stops new submissions and drops everything still to be shown."""
+        def worker(s):
+            try:
+                has_override, summary = self._detect_local_override(s, api_key=api_key)
+                return (s, has_override)
+            except Exception as e:
+                self.log(f"[override] worker error for {s}: {e}")
+                return (s, False)
+
+        override_count = 0
+        todo = iter(serials)
+        pending = {}
+        for s in itertools.islice(todo, OVERRIDE_SWEEP_WORKERS):
+            pending[self._executor.submit(worker, s)] = s
+        batch = []
+        # Flush batches in completion order; each request carries its own socket timeout
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                serial = pending.pop(fut)
+                if self.api_key != api_key:
+                    continue
+                for s in itertools.islice(todo, 1):
+                    pending[self._executor.submit(worker, s)] = s
+                try:
+                    s, has_override = fut.result()
+                except Exception as e:
+                    self.log(f"[override] future error for {serial}: {e}")
+                    continue
+                override_count += has_override
+                batch.append((s, has_override))
+                if len(batch) >= 10:
+                    AppHelper.callAfter(self._apply_override_batch, batch, api_key)
+                    batch = []
+        if self.api_key != api_key:
+            self.log("[override] Bulk check abandoned after logout")
+            return
+        if batch:
+            AppHelper.callAfter(self._apply_override_batch, batch, api_key)
+
+        self.log(f"[override] Bulk check complete. Found {override_count} overrides")
+        if override_count > 0:
+            message = f"Found {override_count} firewalls with local overrides"
+        else:
+            message = "No local overrides detected"
+        AppHelper.callAfter(self._finish_override_sweep, message, api_key)
+
+    def _apply_override_batch(self, batch, api_key):
+        """Main thread: show a batch of (serial, has_override) results from the current session."""
+        if self.api_key != api_key:
+            return
+        for serial, has_override in batch:
+            self._update_override_icon(serial, has_override, list_now=False)
+
+    def _finish_override_sweep(self, message, api_key):
+        if self.api_key == api_key:
+            self._notify("Panorama Sync", "Override Check Complete", message)
+
     def _show_override_details(self, serial):
-        has_override, summary = self._detect_local_override(serial)
+        serial = self._norm_serial(serial)
+        has_override, summary = self._detect_local_override(serial, save_disk=True)
         self._update_override_icon(serial, has_override)
         saved_run = os.path.join(WORK_DIR, f"override_running_{serial}.xml")
         detail_text = None
         if has_override:
             try:
-                with open(saved_run, "r") as f:
-                    run_xml = f.read()
-                try:
-                    import xml.dom.minidom as minidom
-                    dom = minidom.parseString(run_xml)
-                    pretty = dom.toprettyxml(indent="  ")
-                    lines = [line for line in pretty.splitlines() if line.strip()]
-                    detail_text = "\n".join(lines)
-                except Exception:
-                    detail_text = run_xml
+                run_xml = self._running_net_xml.get(serial)
+                if run_xml is None:
+                    with open(saved_run, "r") as f:
+                        run_xml = f.read()
+                # Falls back to the raw text itself when it does not parse
+                detail_text = self._pretty_xml(run_xml).rstrip()
             except Exception as e:
                 detail_text = f"(Failed to load running config: {e})\n\n" + (summary or "")
             detail_text += f"\n\n— Showing running /network —\nSaved file:\n- running: {saved_run}"
@@ -768,7 +1057,6 @@ class PanoramaSyncMonitor(rumps.App):
         alert.setInformativeText_(heading)
 
         try:
-            from AppKit import NSScrollView, NSTextView, NSFont, NSMakeSize
             scroll_frame = ((0, 0), (600, 320))
             scroll = NSScrollView.alloc().initWithFrame_(scroll_frame)
             scroll.setHasVerticalScroller_(True)
@@ -805,12 +1093,10 @@ class PanoramaSyncMonitor(rumps.App):
             trimmed = (detail_text[:1800] + "\n... (truncated)") if len(detail_text) > 1800 else (detail_text or "")
             alert.setInformativeText_(f"{heading}\n\n{trimmed}")
 
-        if os.path.exists(ICON_PATH):
-            icon_image = NSImage.alloc().initWithContentsOfFile_(ICON_PATH)
-            if icon_image:
-                alert.setIcon_(icon_image)
+        icon_image = self._icon_image()
+        if icon_image:
+            alert.setIcon_(icon_image)
         
-        from AppKit import NSApp
         alert.addButtonWithTitle_("OK")
         alert.addButtonWithTitle_("Copy Visible")
 
@@ -818,7 +1104,6 @@ class PanoramaSyncMonitor(rumps.App):
         resp = alert.runModal()
         if resp == 1001:
             try:
-                from AppKit import NSPasteboard, NSPasteboardTypeString
                 pb = NSPasteboard.generalPasteboard()
                 pb.clearContents()
                 pb.setString_forType_(detail_text or "", NSPasteboardTypeString)
@@ -831,12 +1116,55 @@ class PanoramaSyncMonitor(rumps.App):
         if result.clicked and result.text.strip():
             self.title = result.text.strip()
 
+    def _icon_image(self):
+        """Return the app icon NSImage, decoding ICON_PATH only on first use."""
+        if self._icon_img is None and ICON_EXISTS:
+            self._icon_img = NSImage.alloc().initWithContentsOfFile_(ICON_PATH)
+        return self._icon_img
+
+    def _show_native_alert(self, title, body):
+        """Modal NSAlert with the app icon; False when AppKit could not present it."""
+        try:
+            alert = NSAlert.alloc().init()
+            alert.setMessageText_(title)
+            alert.setInformativeText_(body)
+            icon_image = self._icon_image()
+            if icon_image:
+                alert.setIcon_(icon_image)
+            NSApp.activateIgnoringOtherApps_(True)
+            alert.runModal()
+            return True
+        except Exception:
+            return False
+
+    def _hl_colors(self):
+        """Return the (base, tag, attr value, comment, error) highlight colors, resolved once."""
+        palette = self._hl_palette
+        if palette is None:
+            palette = (
+                NSColor.whiteColor(),
+                NSColor.systemBlueColor() if hasattr(NSColor, 'systemBlueColor') else NSColor.blueColor(),
+                NSColor.controlHighlightColor(),
+                NSColor.grayColor(),
+                NSColor.systemRedColor() if hasattr(NSColor, 'systemRedColor') else NSColor.redColor(),
+            )
+            self._hl_palette = palette
+        return palette
+
+    def _hl_setter(self, text_view, storage):
+        """Return the bound call used to color a range of a read-only popup.
+
+        Colors go on as layout-manager temporary attributes, which only affect drawing,
+        so no glyphs are regenerated. Without a layout manager the text storage is
+        edited instead; callers keep their beginEditing/endEditing bracket for that case."""
+        lm = text_view.layoutManager()
+        if lm is not None:
+            return lm.addTemporaryAttribute_value_forCharacterRange_
+        return storage.addAttribute_value_range_
+
     def _apply_xml_highlighting(self, text_view):
         """Apply simple XML syntax coloring to the NSTextView."""
         try:
-            import re
-            from AppKit import NSColor, NSFont, NSForegroundColorAttributeName
-            from Foundation import NSMutableAttributedString
 
             storage = text_view.textStorage()
             if storage is None:
@@ -844,45 +1172,57 @@ class PanoramaSyncMonitor(rumps.App):
             full_text = str(storage.string()) if hasattr(storage, 'string') else text_view.string()
             if not full_text:
                 return
+            if len(full_text) > HL_MAX_CHARS:
+                self.log(f"[highlight] Skipping XML coloring for {len(full_text)} chars (limit {HL_MAX_CHARS})")
+                return
 
-            attr = {
-                NSForegroundColorAttributeName: NSColor.whiteColor(),
-            }
-            attributed = NSMutableAttributedString.alloc().initWithString_attributes_(full_text, attr)
-
-            tag_pattern = re.compile(r"</?([A-Za-z_][\w:.-]*)([^>]*)>")
-            attr_pattern = re.compile(r"([A-Za-z_][\w:.-]*)(\s*=\s*)\"([^\"]*)\"")
-            comment_pattern = re.compile(r"<!--.*?-->", re.DOTALL)
-            error_word_pattern = re.compile(r"\berror\b", re.IGNORECASE)
+            runs = []
 
             def color_range(start, length, color):
-                try:
-                    attributed.addAttribute_value_range_(NSForegroundColorAttributeName, color, (start, length))
-                except Exception:
-                    pass
+                # Runs arrive in paint order; fold one into the previous run when it is
+                # the same color and touches it, so later colors still override earlier ones
+                if runs:
+                    prev_start, prev_end, prev_color = runs[-1]
+                    if prev_color is color and prev_start <= start <= prev_end:
+                        runs[-1] = (prev_start, max(prev_end, start + length), color)
+                        return
+                runs.append((start, start + length, color))
 
             text_str = full_text
+            white, blue, soft, gray, red = self._hl_colors()
+            color_range(0, storage.length(), white)
 
-            for m in comment_pattern.finditer(text_str):
-                color_range(m.start(), m.end() - m.start(), NSColor.grayColor())
-
-            for m in tag_pattern.finditer(text_str):
+            for m in _XML_TOKEN_RE.finditer(text_str):
+                kind = m.lastgroup
                 start, end = m.start(), m.end()
-                color_range(start, end - start, NSColor.systemBlueColor() if hasattr(NSColor, 'systemBlueColor') else NSColor.blueColor())
-                inner = m.group(2) or ""
-                if inner:
-                    inner_start = start + text_str[start:end].find(inner)
-                    for am in attr_pattern.finditer(inner):
-                        val_group = am.group(3)
-                        rel = am.start(3)
-                        abs_start = inner_start + rel
-                        abs_end = abs_start + len(val_group)
-                        color_range(abs_start, abs_end - abs_start, NSColor.controlHighlightColor())
-
-            for m in error_word_pattern.finditer(text_str):
-                color_range(m.start(), m.end() - m.start(), NSColor.systemRedColor() if hasattr(NSColor, 'systemRedColor') else NSColor.redColor())
-
-            storage.setAttributedString_(attributed)
+                if kind == 'err':
+                    color_range(start, end - start, red)
+                    continue
+                if kind == 'comment':
+                    color_range(start, end - start, gray)
+                else:
+                    color_range(start, end - start, blue)
+                    inner_start, inner_end = m.span('inner')
+                    if inner_start != inner_end:
+                        for am in _XML_ATTR_RE.finditer(text_str, inner_start, inner_end):
+                            val_start, val_end = am.span(3)
+                            color_range(val_start, val_end - val_start, soft)
+                # "error" inside a tag or comment still wins, as before; only the token is rescanned
+                for em in _ERROR_WORD_RE.finditer(text_str, start, end):
+                    color_range(em.start(), em.end() - em.start(), red)
+
+            # Resolve the selector once; each call then only bridges the (location, length) pair
+            add_attr = self._hl_setter(text_view, storage)
+            fg = NSForegroundColorAttributeName
+            storage.beginEditing()
+            try:
+                for start, end, color in runs:
+                    try:
+                        add_attr(fg, color, (start, end - start))
+                    except Exception:
+                        pass
+            finally:
+                storage.endEditing()
         except Exception as e:
             try:
                 print(f"XML highlighting skipped: {e}")
@@ -892,40 +1232,28 @@ class PanoramaSyncMonitor(rumps.App):
     def _apply_human_highlighting(self, text_view):
         """Apply simple 'Human Readable' coloring."""
         try:
-            from AppKit import NSColor
-            from Foundation import NSMutableAttributedString, NSMakeRange
-            from AppKit import NSForegroundColorAttributeName
 
             storage = text_view.textStorage()
             full_text = str(storage.string()) if hasattr(storage, 'string') else text_view.string()
             if not full_text:
                 return
+            if len(full_text) > HL_MAX_CHARS:
+                self.log(f"[highlight] Skipping human coloring for {len(full_text)} chars (limit {HL_MAX_CHARS})")
+                return
+            white, blue = self._hl_colors()[:2]
 
-            attributed = NSMutableAttributedString.alloc().initWithString_attributes_(
-                full_text,
-                {NSForegroundColorAttributeName: NSColor.whiteColor()}
-            )
-
-            offset = 0
-            for line in full_text.splitlines(keepends=True):
-                colon_idx = -1
-                for i, ch in enumerate(line):
-                    if ch == ':':
-                        colon_idx = i
-                        break
-                if colon_idx > 0:
-                    rng = (offset, colon_idx + 1)
+            add_attr = self._hl_setter(text_view, storage)
+            fg = NSForegroundColorAttributeName
+            storage.beginEditing()
+            try:
+                add_attr(fg, white, (0, storage.length()))
+                for m in _HUMAN_KEY_RE.finditer(full_text):
                     try:
-                        attributed.addAttribute_value_range_(
-                            NSForegroundColorAttributeName,
-                            NSColor.systemBlueColor() if hasattr(NSColor, 'systemBlueColor') else NSColor.blueColor(),
-                            rng
-                        )
+                        add_attr(fg, blue, (m.start(), m.end() - m.start()))
                     except Exception:
                         pass
-                offset += len(line)
-
-            storage.setAttributedString_(attributed)
+            finally:
+                storage.endEditing()
         except Exception as e:
             try:
                 print(f"Human highlighting skipped: {e}")
@@ -933,19 +1261,22 @@ class PanoramaSyncMonitor(rumps.App):
                 pass
 
     def _show_tabbed_alert(self, heading: str, tabs: list, width: int = 720, height: int = 400):
-        """Show an NSAlert with a tabbed accessory view."""
-        try:
-            from AppKit import (
-                NSAlert, NSTabView, NSTabViewItem, NSScrollView, NSTextView,
-                NSFont, NSImage, NSApp, NSMakeRect
-            )
+        """Show an NSAlert with a tabbed accessory view.
 
+        A tab's content may be a zero-argument callable; it is only called when that
+        tab is first shown, and the first tab with ready text is selected initially."""
+        try:
             alert = NSAlert.alloc().init()
             alert.setMessageText_(heading)
 
             tab_view = NSTabView.alloc().initWithFrame_(NSMakeRect(0, 0, width, height))
+            pending = {}
+            initial_index = None
 
-            for (tab_title, content_text) in tabs:
+            for index, (tab_title, content_text) in enumerate(tabs):
+                lazy = callable(content_text)
+                if not lazy and initial_index is None:
+                    initial_index = index
                 scroll = NSScrollView.alloc().initWithFrame_(NSMakeRect(0, 0, width, height))
                 scroll.setHasVerticalScroller_(True)
                 scroll.setHasHorizontalScroller_(True)
@@ -958,9 +1289,8 @@ class PanoramaSyncMonitor(rumps.App):
                     text_view.setFont_(mono)
                 except Exception:
                     pass
-                text_view.setString_(content_text or "")
+                text_view.setString_("" if lazy else (content_text or ""))
                 try:
-                    from AppKit import NSMakeSize
                     text_view.setRichText_(False)
                     text_view.setHorizontallyResizable_(True)
                     text_view.setVerticallyResizable_(True)
@@ -973,12 +1303,12 @@ class PanoramaSyncMonitor(rumps.App):
                 except Exception:
                     pass
                 
+                highlight = None
                 tab_lower = (tab_title or "").strip().lower()
                 if tab_lower == "raw":
-                    self._apply_xml_highlighting(text_view)
+                    highlight = functools.partial(self._apply_xml_highlighting, text_view)
                 elif tab_lower == "human readable":
                     try:
-                        from AppKit import NSMakeSize
                         text_view.setRichText_(False)
                         text_view.setHorizontallyResizable_(True)
                         tc = text_view.textContainer()
@@ -989,7 +1319,11 @@ class PanoramaSyncMonitor(rumps.App):
                         scroll.setAutohidesScrollers_(False)
                     except Exception:
                         pass
-                    self._apply_human_highlighting(text_view)
+                    highlight = functools.partial(self._apply_human_highlighting, text_view)
+                if lazy:
+                    pending[tab_title] = functools.partial(self._fill_tab, text_view, content_text, highlight)
+                elif highlight is not None:
+                    pending[tab_title] = highlight
 
                 scroll.setDocumentView_(text_view)
 
@@ -998,12 +1332,18 @@ class PanoramaSyncMonitor(rumps.App):
                 tab_item.setView_(scroll)
                 tab_view.addTabViewItem_(tab_item)
 
+            if initial_index:
+                tab_view.selectTabViewItemAtIndex_(initial_index)
+            # Fill and highlight only the tab on screen; the rest are done when first selected
+            delegate = _TabHighlightDelegate.alloc().initWithPending_(pending)
+            tab_view.setDelegate_(delegate)
+            delegate.highlightItem_(tab_view.selectedTabViewItem())
+
             alert.setAccessoryView_(tab_view)
 
-            if os.path.exists(ICON_PATH):
-                icon_image = NSImage.alloc().initWithContentsOfFile_(ICON_PATH)
-                if icon_image:
-                    alert.setIcon_(icon_image)
+            icon_image = self._icon_image()
+            if icon_image:
+                alert.setIcon_(icon_image)
 
             alert.addButtonWithTitle_("OK")
             alert.addButtonWithTitle_("Copy Visible")
@@ -1016,7 +1356,6 @@ class PanoramaSyncMonitor(rumps.App):
                     scroll = current_item.view()
                     tv = scroll.documentView()
                     visible_text = tv.string()
-                    from AppKit import NSPasteboard, NSPasteboardTypeString
                     pb = NSPasteboard.generalPasteboard()
                     pb.clearContents()
                     pb.setString_forType_(visible_text or "", NSPasteboardTypeString)
@@ -1025,13 +1364,18 @@ class PanoramaSyncMonitor(rumps.App):
         except Exception as e:
             joined = []
             for (t, txt) in tabs:
-                joined.append(f"===== {t} =====\n{txt}")
+                joined.append(f"===== {t} =====\n{txt() if callable(txt) else txt}")
             self._show_monospaced_alert(heading, "\n\n".join(joined), width=width, height=height)
 
+    def _fill_tab(self, text_view, produce, highlight):
+        """Set a lazy tab's text on first display, then highlight it."""
+        text_view.setString_(produce() or "")
+        if highlight is not None:
+            highlight()
+
     def _show_monospaced_alert(self, heading: str, detail_text: str, width: int = 640, height: int = 360):
         """Show a nicely formatted alert with monospaced text."""
         try:
-            from AppKit import NSAlert, NSScrollView, NSView, NSMakeRect, NSSize, NSTextView, NSFont, NSImage, NSApp
 
             alert = NSAlert.alloc().init()
             alert.setMessageText_(heading)
@@ -1056,41 +1400,21 @@ class PanoramaSyncMonitor(rumps.App):
             scroll.setDocumentView_(text_view)
             alert.setAccessoryView_(scroll)
 
-            if os.path.exists(ICON_PATH):
-                icon_image = NSImage.alloc().initWithContentsOfFile_(ICON_PATH)
-                if icon_image:
-                    alert.setIcon_(icon_image)
+            icon_image = self._icon_image()
+            if icon_image:
+                alert.setIcon_(icon_image)
 
             NSApp.activateIgnoringOtherApps_(True)
             alert.runModal()
         except Exception as e:
-            try:
-                from AppKit import NSAlert, NSImage, NSApp
-                alert = NSAlert.alloc().init()
-                alert.setMessageText_(heading)
-                trimmed = (detail_text[:1800] + "\n... (truncated)") if len(detail_text) > 1800 else detail_text
-                alert.setInformativeText_(trimmed)
-
-                if os.path.exists(ICON_PATH):
-                    icon_image = NSImage.alloc().initWithContentsOfFile_(ICON_PATH)
-                    if icon_image:
-                        alert.setIcon_(icon_image)
-
-                NSApp.activateIgnoringOtherApps_(True)
-                alert.runModal()
-            except Exception:
+            trimmed = (detail_text[:1800] + "\n... (truncated)") if len(detail_text) > 1800 else detail_text
+            if not self._show_native_alert(heading, trimmed):
                 print(detail_text)
 
     def log(self, message):
         try:
             sanitized = self._sanitize_log(message)
-            handler = RotatingFileHandler(LOG_FILE, maxBytes=10*1024*1024, backupCount=5)
-            handler.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(message)s"))
-            logger = logging.getLogger(f"PanoramaSyncLogger_{id(self)}")
-            if not logger.handlers:
-                logger.addHandler(handler)
-                logger.setLevel(logging.INFO)
-            logger.info(sanitized)
+            app_logger.info(sanitized)
             print(f"[{time.strftime('%H:%M:%S')}] {sanitized}")
         except Exception as e:
             print(f"Logging error: {e}")
@@ -1098,11 +1422,19 @@ class PanoramaSyncMonitor(rumps.App):
     # ==== Custom CLI Commands (persisted) ====
     def _load_custom_commands(self) -> list:
         try:
-            if os.path.exists(CUSTOM_CMDS_FILE):
-                with open(CUSTOM_CMDS_FILE, 'r') as f:
-                    data = json.load(f)
-                    if isinstance(data, list):
-                        return data
+            mtime = os.stat(CUSTOM_CMDS_FILE).st_mtime_ns
+        except OSError:
+            return []
+        cached_mtime, cached = self._custom_cmds_cache
+        if cached is not None and cached_mtime == mtime:
+            return list(cached)
+        try:
+            with open(CUSTOM_CMDS_FILE, 'r') as f:
+                data = json.load(f)
+            if not isinstance(data, list):
+                data = []
+            self._custom_cmds_cache = (mtime, data)
+            return list(data)
         except Exception as e:
             self.log(f"[CustomCmds] Load error: {e}")
         return []
@@ -1112,11 +1444,12 @@ class PanoramaSyncMonitor(rumps.App):
             with open(CUSTOM_CMDS_FILE, 'w') as f:
                 json.dump(cmds, f, indent=2)
             self._secure_file_permissions(CUSTOM_CMDS_FILE)
+            self._custom_cmds_cache = (os.stat(CUSTOM_CMDS_FILE).st_mtime_ns, list(cmds))
         except Exception as e:
+            self._custom_cmds_cache = (None, None)
             self.log(f"[CustomCmds] Save error: {e}")
 
     def _add_custom_command_ui(self, _=None):
-        from AppKit import NSApp, NSAlert, NSTextField, NSView, NSMakeRect
         NSApp.activateIgnoringOtherApps_(True)
         alert = NSAlert.alloc().init()
         alert.setMessageText_("Add Custom Command")
@@ -1253,24 +1586,20 @@ class PanoramaSyncMonitor(rumps.App):
     def _clear_loaded_state(self):
         """Clear all loaded/cached data and reset UI menus."""
         try:
-            try:
-                for t in list(getattr(self, "_pending_timers", set())):
-                    try:
-                        t.stop()
-                    except Exception:
-                        pass
-                if hasattr(self, "_pending_timers"):
-                    self._pending_timers.clear()
-            except Exception:
-                pass
-
             try:
                 self._override_cache.clear()
+                self._running_net_xml.clear()
+                with self._pretty_lock:
+                    self._pretty_cache.clear()
             except Exception:
                 pass
             try:
                 self._fw_items.clear()
                 self._fw_base.clear()
+                self._fw_titles.clear()
+                self._fw_rows.clear()
+                self._fw_menu_stale = False
+                self._menu_dirty = False
             except Exception:
                 pass
 
@@ -1327,17 +1656,16 @@ class PanoramaSyncMonitor(rumps.App):
         self.api_key = None
 
         try:
-            if threading.current_thread().name == 'MainThread':
+            if threading.get_ident() == self._main_ident:
                 self._clear_loaded_state()
             else:
-                self._on_main(self._clear_loaded_state)
+                AppHelper.callAfter(self._clear_loaded_state)
         except Exception:
             self._clear_loaded_state()
 
         rumps.alert("Logged out. All cached items and credentials cleared.")
 
     def login_to_panorama(self, _):
-        from AppKit import NSApp, NSAlert, NSTextField, NSSecureTextField
         NSApp.activateIgnoringOtherApps_(True)
 
         # Step 1: Panorama host
@@ -1395,28 +1723,47 @@ class PanoramaSyncMonitor(rumps.App):
             rumps.alert("Login cancelled or incomplete.")
             return
 
-        # Step 4: Try to get API key
+        # Step 4: Request the API key on a warm executor thread so the menu bar stays responsive
+        self._executor.submit(self._do_keygen, pan_url, username, password)
+
+    def _do_keygen(self, pan_url, username, password):
+        """Worker: request an API key, then hand the outcome to _finish_login on the main thread."""
+        key = msg = error = None
         try:
-            api_url = f"https://{pan_url}/api/?type=keygen&user={username}&password={password}"
-            r = self._make_request(api_url, timeout=10)
-            root = ET.fromstring(r.text)
-            key = root.findtext(".//key")
-            if key:
-                self.panorama_url = pan_url
-                self.username = username
-                self.password = password
-                self.api_key = key
-                self.store_login()
-                rumps.alert("Login successful! API key acquired and stored securely.")
-                # Auto-fetch key objects after successful login
-                self.fetch_firewalls(None)
-                self.fetch_templates(None)
-                self.fetch_device_groups(None)
-            else:
-                msg = root.findtext(".//msg") or "Unknown error"
-                rumps.alert(f"Login failed: {msg}")
+            # Straight to the session: the SSL "Allow Once" prompt in _make_request is main-thread only
+            r = self._http.get(
+                f"https://{pan_url}/api/",
+                params={"type": "keygen", "user": username, "password": password},
+                timeout=10,
+            )
+            key = _first_element_text(r.content, "key")
+            if not key:
+                msg = _first_element_text(r.content, "msg")
         except Exception as e:
-            rumps.alert(f"Error during login: {e}")
+            error = e
+        AppHelper.callAfter(self._finish_login, pan_url, username, password, key, msg, error)
+
+    def _finish_login(self, pan_url, username, password, key, msg, error):
+        """Main thread: store credentials and fetch, or report why keygen failed."""
+        if error is not None:
+            if isinstance(error, requests.exceptions.SSLError):
+                rumps.alert(f"Error during login: {error}\n\nCheck SSL Settings (custom CA or verification).")
+            else:
+                rumps.alert(f"Error during login: {error}")
+            return
+        if not key:
+            rumps.alert(f"Login failed: {msg or 'Unknown error'}")
+            return
+        self.panorama_url = pan_url
+        self.username = username
+        self.password = password
+        self.api_key = key
+        self.store_login()
+        rumps.alert("Login successful! API key acquired and stored securely.")
+        # Auto-fetch key objects after successful login
+        self.fetch_firewalls(None)
+        self.fetch_templates(None)
+        self.fetch_device_groups(None)
 
     def _show_vpn_info(self, serial: str, which: str):
         """Run predefined show commands with the tabbed Raw/Human popup."""
@@ -1435,101 +1782,115 @@ class PanoramaSyncMonitor(rumps.App):
             self._show_monospaced_alert("VPN Show Error", f"{which}: {e}")
 
     def _pretty_xml(self, text_or_bytes):
-        """Pretty-print XML without extra blank lines."""
+        """Pretty-print XML without extra blank lines; results are cached by content hash."""
         try:
             raw = text_or_bytes if isinstance(text_or_bytes, (bytes, bytearray)) else str(text_or_bytes).encode("utf-8")
-            root = ET.fromstring(raw)
-            for el in root.iter():
-                if el.text is not None and el.text.strip() == "":
-                    el.text = None
-                if el.tail is not None and el.tail.strip() == "":
-                    el.tail = None
-            xml_bytes = ET.tostring(root, encoding="utf-8")
-            from xml.dom import minidom
-            parsed = minidom.parseString(xml_bytes)
-            return parsed.toprettyxml(indent="  ", newl="\n")
+            key = hashlib.blake2b(raw, digest_size=16).digest()
+            with self._pretty_lock:
+                cached = self._pretty_cache.get(key)
+                if cached is not None:
+                    self._pretty_cache.move_to_end(key)
+                    return cached
+            if LXML_AVAILABLE:
+                parser = LET.XMLParser(remove_blank_text=True, resolve_entities=False, no_network=True)
+                pretty = LET.tostring(LET.fromstring(raw, parser), pretty_print=True, encoding="unicode")
+            else:
+                root = ET.fromstring(raw)
+                ET.indent(root, space="  ")
+                pretty = ET.tostring(root, encoding="unicode")
+            with self._pretty_lock:
+                self._pretty_cache[key] = pretty
+                if len(self._pretty_cache) > PRETTY_CACHE_SIZE:
+                    self._pretty_cache.popitem(last=False)
+            return pretty
         except Exception:
             return text_or_bytes.decode("utf-8", "ignore") if isinstance(text_or_bytes, (bytes, bytearray)) else str(text_or_bytes)
 
-    def run_op_cmd(self, serial: str, xml_cmd: str) -> str:
-        """Execute a Panorama operational command with raw XML."""
+    def run_op_cmd(self, serial: str, xml_cmd: str, as_bytes: bool = False):
+        """Execute a Panorama operational command with raw XML.
+
+        With as_bytes the undecoded body is returned, for callers that only parse it."""
         if not self.api_key:
             rumps.alert("Please login first.")
             return "Error: not logged in"
         try:
-            from urllib.parse import quote
-            url = f"https://{self.panorama_url}/api/?key={self.api_key}&type=op&cmd={quote(xml_cmd)}&target={serial}"
             self.log(f"[op] GET (sanitized URL)")
-            r = self._make_request(url, timeout=30)
-            return r.text
+            r = self._api_get({"type": "op", "cmd": xml_cmd, "target": serial}, timeout=30)
+            return r.content if as_bytes else r.text
         except Exception as e:
             return f"Error: {e}"
 
-    def _humanize_generic_xml(self, xml_text: str, max_cols: int = 10, max_rows: int = 500) -> str:
+    def _humanize_generic_xml(self, xml_text, max_cols: int = 10, max_rows: int = 500) -> str:
         """Generic fallback: render sibling <entry> lists as a table."""
         try:
-            root = ET.fromstring(xml_text)
-            entries = root.findall('.//entry')
+            root = self._parse_xml(xml_text)
+            entries = _xml_entries(root)
             if entries:
                 cols = []
-                for e in entries:
+                seen = set()
+                for e in entries[:max_rows]:
                     for c in e:
-                        if c.tag not in cols:
+                        if c.tag not in seen:
+                            seen.add(c.tag)
                             cols.append(c.tag)
+                            if len(cols) >= max_cols:
+                                break
                     if len(cols) >= max_cols:
                         break
                 rows = []
                 for e in entries[:max_rows]:
                     rows.append([ (e.findtext(col) or '').strip() for col in cols ])
-                widths = [ max(len(col), max((len(r[i]) for r in rows), default=0)) for i,col in enumerate(cols) ]
-                out = [" ".join(col.ljust(widths[i]) for i, col in enumerate(cols))]
-                out.append("-" * (sum(widths)+len(widths)-1))
-                for r in rows:
-                    out.append(" ".join(r[i].ljust(widths[i]) for i in range(len(cols))))
-                return "\n".join(out)
+                return _render_table(cols, rows)
+            # Iterative pre-order walk; each node's path is built once from its parent's
             lines = []
-            def walk(node, path):
+            stack = [(root, root.tag)]
+            while stack:
+                node, path = stack.pop()
                 text = (node.text or '').strip()
                 if text:
-                    lines.append(f"{'/'.join(path+[node.tag])}: {text}")
-                for child in list(node):
-                    walk(child, path+[node.tag])
-            walk(root, [])
+                    lines.append(f"{path}: {text}")
+                children = [c for c in node if isinstance(c.tag, str)]
+                for child in reversed(children):
+                    stack.append((child, f"{path}/{child.tag}"))
             return "\n".join(lines) if lines else self._pretty_xml(xml_text)
         except Exception:
             return self._pretty_xml(xml_text)
 
-    def _humanize_ike_summary(self, xml_text: str, only_gateway: str = None) -> str:
+    def _humanize_ike_summary(self, xml_text, only_gateway: str = None) -> str:
         """Render IKE SA summary into a table."""
         try:
-            def gv(elem, names, default=""):
+            def gv(fields, names, default=""):
                 for n in names:
-                    v = elem.findtext(n)
-                    if v is not None and str(v).strip() != "":
-                        return str(v).strip()
+                    v = fields.get(n)
+                    if v:
+                        return v
                 return default
 
-            root = ET.fromstring(xml_text)
-            entries = root.findall(".//entry")
+            root = self._parse_xml(xml_text)
             rows = []
 
+            if only_gateway:
+                entries = _xml_entries_named(root, _XP_IKE_BY_NAME, only_gateway)
+            else:
+                entries = _xml_entries(root)
             for e in entries:
-                gw = gv(e, ["gateway", "name"]) or (e.get("name") or "").strip()
+                f = _child_texts(e)
+                gw = gv(f, ["gateway", "name"]) or (e.get("name") or "").strip()
                 if only_gateway and gw != only_gateway:
                     continue
 
-                state = gv(e, ["state", "sa", "status", "phase1-state"])
-                version = gv(e, ["version", "mode"])
-                local_ip = gv(e, ["local-ip", "local", "local_ip"])
-                peer_ip = gv(e, ["peer-ip", "peer", "peer_ip", "remote"])
-                established = gv(e, ["established", "created", "start-time", "start_time"])
+                state = gv(f, ["state", "sa", "status", "phase1-state"])
+                version = gv(f, ["version", "mode"])
+                local_ip = gv(f, ["local-ip", "local", "local_ip"])
+                peer_ip = gv(f, ["peer-ip", "peer", "peer_ip", "remote"])
+                established = gv(f, ["established", "created", "start-time", "start_time"])
 
-                role = gv(e, ["role"])
-                algo = gv(e, ["algo", "algorithm"])
+                role = gv(f, ["role"])
+                algo = gv(f, ["algo", "algorithm"])
 
                 if not any([state, local_ip, peer_ip, established]) and (role or algo):
                     state = role
-                    established = established or gv(e, ["expires"])
+                    established = established or gv(f, ["expires"])
                     version = version or ""
                     if not peer_ip and algo:
                         peer_ip = algo
@@ -1539,80 +1900,88 @@ class PanoramaSyncMonitor(rumps.App):
             if not rows:
                 return "No IKE SAs found."
 
-            headers = ("Gateway", "State", "Version", "Local IP", "Peer IP", "Established/Created")
-            widths = [max(len(h), max((len(r[i]) for r in rows), default=0)) for i, h in enumerate(headers)]
-
-            out = [" ".join(h.ljust(widths[i]) for i, h in enumerate(headers))]
-            out.append("-" * (sum(widths) + len(widths) - 1))
-            for r in rows:
-                out.append(" ".join((r[i] or "").ljust(widths[i]) for i in range(len(headers))))
-            return "\n".join(out)
+            return _render_table(_IKE_HEADERS, rows)
         except Exception:
             return self._pretty_xml(xml_text)
 
-    def _humanize_ipsec_summary(self, xml_text: str, only_tunnel: str = None) -> str:
+    def _humanize_ipsec_summary(self, xml_text, only_tunnel: str = None) -> str:
         """Render IPsec SA summary into a table."""
         try:
-            def gv(elem, names, default=""):
+            def gv(fields, names, default=""):
                 for n in names:
-                    v = elem.findtext(n)
-                    if v is not None and str(v).strip() != "":
-                        return str(v).strip()
+                    v = fields.get(n)
+                    if v:
+                        return v
                 return default
 
-            root = ET.fromstring(xml_text)
-            entries = root.findall(".//entry")
+            root = self._parse_xml(xml_text)
             rows = []
 
+            if only_tunnel:
+                entries = _xml_entries_named(root, _XP_IPSEC_BY_NAME, only_tunnel)
+            else:
+                entries = _xml_entries(root)
             for e in entries:
-                tun = gv(e, ["tunnel", "name"]) or (e.get("name") or "").strip()
+                f = _child_texts(e)
+                tun = gv(f, ["tunnel", "name"]) or (e.get("name") or "").strip()
                 if only_tunnel and tun != only_tunnel:
                     continue
-                state = gv(e, ["state", "status"])
-                spi_in = gv(e, ["spi-in", "spi_in", "inbound-spi", "spiIn"])
-                spi_out = gv(e, ["spi-out", "spi_out", "outbound-spi", "spiOut"])
-                enc = gv(e, ["encryption", "enc", "cipher"])
-                auth = gv(e, ["authentication", "auth", "integrity"])
-                bytes_in = gv(e, ["bytes-in", "bytes_in", "inbound-bytes", "inBytes"])
-                bytes_out = gv(e, ["bytes-out", "bytes_out", "outbound-bytes", "outBytes"])
+                state = gv(f, ["state", "status"])
+                spi_in = gv(f, ["spi-in", "spi_in", "inbound-spi", "spiIn"])
+                spi_out = gv(f, ["spi-out", "spi_out", "outbound-spi", "spiOut"])
+                enc = gv(f, ["encryption", "enc", "cipher"])
+                auth = gv(f, ["authentication", "auth", "integrity"])
+                bytes_in = gv(f, ["bytes-in", "bytes_in", "inbound-bytes", "inBytes"])
+                bytes_out = gv(f, ["bytes-out", "bytes_out", "outbound-bytes", "outBytes"])
 
                 rows.append((tun, state, enc, auth, spi_in, spi_out, bytes_in, bytes_out))
 
             if not rows:
                 return "No IPsec SAs found."
 
-            headers = ("Tunnel", "State", "Enc", "Auth", "SPI In", "SPI Out", "Bytes In", "Bytes Out")
-            widths = [max(len(h), max((len(r[i]) for r in rows), default=0)) for i, h in enumerate(headers)]
-
-            out = [" ".join(h.ljust(widths[i]) for i, h in enumerate(headers))]
-            out.append("-" * (sum(widths) + len(widths) - 1))
-            for r in rows:
-                out.append(" ".join((r[i] or "").ljust(widths[i]) for i in range(len(headers))))
-            return "\n".join(out)
+            return _render_table(_IPSEC_HEADERS, rows)
         except Exception:
             return self._pretty_xml(xml_text)
 
+    def _humanize_interfaces(self, xml_text) -> str:
+        """Render 'show interface all' hardware entries one line each."""
+        try:
+            rows = _result_section_lines(xml_text, "hw")
+            if rows is None:
+                return "(No human-readable formatter for this command)\nSee Raw tab."
+            return "\n".join(rows) if rows else "No entries."
+        except Exception:
+            return "(No human-readable formatter for this command)\nSee Raw tab."
+
+    def _humanize_arp(self, xml_text) -> str:
+        """Render 'show arp all' entries one line each."""
+        try:
+            rows = _result_section_lines(xml_text, "entries") or []
+            return "\n".join(rows) if rows else "No ARP entries."
+        except Exception:
+            return "(No human-readable formatter for this command)\nSee Raw tab."
+
     def show_ike_summary(self, serial):
-        xml = self.run_op_cmd(serial, "<show><vpn><ike-sa><summary></summary></ike-sa></vpn></show>")
-        raw = self._pretty_xml(xml)
+        xml = self.run_op_cmd(serial, "<show><vpn><ike-sa><summary></summary></ike-sa></vpn></show>", as_bytes=True)
+        raw = functools.partial(self._pretty_xml, xml)
         human = self._humanize_ike_summary(xml) or self._humanize_generic_xml(xml)
         self._show_tabbed_alert("IKE Gateways (Summary)", [("Raw", raw), ("Human Readable", human)], width=1000, height=500)
 
     def show_ipsec_summary(self, serial):
-        xml = self.run_op_cmd(serial, "<show><vpn><ipsec-sa><summary></summary></ipsec-sa></vpn></show>")
-        raw = self._pretty_xml(xml)
+        xml = self.run_op_cmd(serial, "<show><vpn><ipsec-sa><summary></summary></ipsec-sa></vpn></show>", as_bytes=True)
+        raw = functools.partial(self._pretty_xml, xml)
         human = self._humanize_ipsec_summary(xml) or self._humanize_generic_xml(xml)
         self._show_tabbed_alert("IPsec Tunnels (Summary)", [("Raw", raw), ("Human Readable", human)], width=1000, height=500)
 
     def show_prisma_ike_gw(self, serial):
-        xml = self.run_op_cmd(serial, "<show><vpn><ike-sa><gateway>prisma-ike-gw</gateway></ike-sa></vpn></show>")
-        raw = self._pretty_xml(xml)
+        xml = self.run_op_cmd(serial, "<show><vpn><ike-sa><gateway>prisma-ike-gw</gateway></ike-sa></vpn></show>", as_bytes=True)
+        raw = functools.partial(self._pretty_xml, xml)
         human = self._humanize_ike_summary(xml, only_gateway="prisma-ike-gw") or self._humanize_generic_xml(xml)
         self._show_tabbed_alert("Prisma IKE Gateway", [("Raw", raw), ("Human Readable", human)], width=1000, height=500)
 
     def show_prisma_ipsec_tunnel(self, serial):
-        xml = self.run_op_cmd(serial, "<show><vpn><ipsec-sa><tunnel>prisma-tunnel</tunnel></ipsec-sa></vpn></show>")
-        raw = self._pretty_xml(xml)
+        xml = self.run_op_cmd(serial, "<show><vpn><ipsec-sa><tunnel>prisma-tunnel</tunnel></ipsec-sa></vpn></show>", as_bytes=True)
+        raw = functools.partial(self._pretty_xml, xml)
         human = self._humanize_ipsec_summary(xml, only_tunnel="prisma-tunnel") or self._humanize_generic_xml(xml)
         self._show_tabbed_alert("Prisma IPsec Tunnel", [("Raw", raw), ("Human Readable", human)], width=1000, height=500)
 
@@ -1628,13 +1997,13 @@ class PanoramaSyncMonitor(rumps.App):
                 m = _re.search(r"(?:gateway|gw)\s+(.+)$", s, flags=_re.IGNORECASE)
                 if m:
                     gw = m.group(1).strip().strip('"')
-                    return f"<test><vpn><ike-sa><gateway>{gw}</gateway></ike-sa></vpn></test>"
+                    return f"<test><vpn><ike-sa><gateway>{escape(gw)}</gateway></ike-sa></vpn></test>"
                 return "<test><vpn><ike-sa/></vpn></test>"
             if low.startswith("test vpn ipsec-sa"):
                 m = _re.search(r"(?:tunnel|tnl)\s+(.+)$", s, flags=_re.IGNORECASE)
                 if m:
                     tn = m.group(1).strip().strip('"')
-                    return f"<test><vpn><ipsec-sa><tunnel>{tn}</tunnel></ipsec-sa></vpn></test>"
+                    return f"<test><vpn><ipsec-sa><tunnel>{escape(tn)}</tunnel></ipsec-sa></vpn></test>"
                 return "<test><vpn><ipsec-sa/></vpn></test>"
             return None
         except Exception:
@@ -1647,8 +2016,8 @@ class PanoramaSyncMonitor(rumps.App):
             if not xml_cmd:
                 self._show_monospaced_alert("Unsupported Test Command", f"Could not parse test command:\n{cli}")
                 return
-            xml = self.run_op_cmd(serial, xml_cmd)
-            raw = self._pretty_xml(xml)
+            xml = self.run_op_cmd(serial, xml_cmd, as_bytes=True)
+            raw = functools.partial(self._pretty_xml, xml)
             l = (cli or "").lower()
             if "ipsec-sa" in l:
                 human = self._humanize_ipsec_summary(xml) or self._humanize_generic_xml(xml)
@@ -1669,90 +2038,141 @@ class PanoramaSyncMonitor(rumps.App):
         self._execute_test_command(serial, "test vpn ipsec-sa tunnel prisma-tunnel", popup_title="Test Prisma IPSec tunnel")
 
 
+    def _build_fw_item(self, hostname, mgmt_ip, serial, icon, custom_cmds):
+        """Build the per-firewall submenu shared by both firewall fetchers."""
+        item = rumps.MenuItem(f"{icon} {hostname}")
+        item.add(rumps.MenuItem(
+            "Open in Browser",
+            callback=_menu_cb(webbrowser.open, f"https://{mgmt_ip}")
+        ))
+        item.add(rumps.MenuItem(
+            "Show System Info",
+            callback=_menu_cb(self.fetch_system_info, mgmt_ip, serial)
+        ))
+        item.add(None)
+        item.add(rumps.MenuItem(
+            "Check Local Overrides",
+            callback=_menu_cb(self._show_override_details, serial)
+        ))
+        item.add(rumps.MenuItem(
+            "Show Local Overrides",
+            callback=_menu_cb(self._show_override_details, serial)
+        ))
+        item.add(None)
+        custom_menu = rumps.MenuItem("Custom Commands")
+        custom_menu.add(rumps.MenuItem(
+            "Send Custom Command…",
+            callback=_menu_cb(self.send_cli_command, mgmt_ip, serial)
+        ))
+        custom_menu.add(None)
+        for cc in custom_cmds:
+            lbl = cc.get('label') or cc.get('cmd')
+            cmd = cc.get('cmd')
+            custom_menu.add(rumps.MenuItem(lbl,
+                                           callback=_menu_cb(self._run_custom_command, serial, lbl, cmd)))
+        custom_menu.add(None)
+        custom_menu.add(rumps.MenuItem("Add Custom Command", callback=self._add_custom_command_ui))
+        custom_menu.add(rumps.MenuItem("Delete Custom Command", callback=self._delete_custom_command_ui))
+        item.add(custom_menu)
+        item.add(None)
+        return item
+
+    def _scan_device_entries(self, raw):
+        """Stream a show-devices response and return (saw_entries, rows) without keeping the tree.
+
+        rows are (hostname, ip, serial, connected_raw) for entries carrying all three
+        identifiers, sorted by hostname; each <entry> is cleared once its fields are read."""
+        saw_entries = False
+        rows = []
+        for _, elem in _iterparse(raw, ("end",)):
+            if elem.tag != 'entry':
+                continue
+            saw_entries = True
+            hostname = elem.findtext('hostname')
+            mgmt_ip = elem.findtext('ip-address')
+            serial = elem.findtext('serial')
+            if hostname not in (None, 'N/A') and mgmt_ip not in (None, 'N/A') and serial not in (None, 'N/A'):
+                connected_raw = next(
+                    (c for c in map(elem.findtext, _CONNECTED_FIELDS) if c is not None), ""
+                )
+                rows.append((hostname, mgmt_ip, serial, connected_raw))
+            elem.clear()
+        rows.sort(key=operator.itemgetter(0))
+        return saw_entries, rows
+
+    def _run_in_background(self, work, done):
+        """Run work() on the shared executor, then call done(result, error) on the main thread.
+
+        Results that land after a logout (API key changed) are dropped."""
+        api_key = self.api_key
+
+        def deliver(result, error):
+            if self.api_key != api_key:
+                return
+            done(result, error)
+
+        def task():
+            try:
+                result, error = work(), None
+            except Exception as e:
+                result, error = None, e
+            AppHelper.callAfter(deliver, result, error)
+
+        return self._executor.submit(task)
+
+    def _request_device_entries(self, cmd, log_name, tag):
+        """Worker: fetch a show-devices list, keep a copy on disk and scan its entries."""
+        r = self._api_get({"type": "op", "cmd": cmd}, timeout=10)
+        self._write_log_async(log_name, r.content)
+        self.log(f"{tag} Fetched successfully")
+        return self._scan_device_entries(r.content)
+
+    def _request_entries(self, cmd, log_name, tag):
+        """Worker: fetch an op listing, keep a copy on disk and return its <entry> elements."""
+        r = self._api_get({"type": "op", "cmd": cmd}, timeout=10)
+        self.log(f"{tag} Fetched successfully")
+        self._write_log_async(log_name, r.content)
+        root = self._parse_xml(r.content)
+        return _xml_entries(root)
+
     def fetch_firewalls(self, _):
         if not self.api_key or not self.panorama_url:
             rumps.alert("Please login first.")
             return
+        cmd = "<show><devices><all></all></devices></show>"
+        self._run_in_background(
+            lambda: self._request_device_entries(cmd, "firewall_sync_log.xml", "[Firewalls]"),
+            self._apply_firewalls,
+        )
+
+    def _apply_firewalls(self, result, error):
+        """Main thread: rebuild the Firewalls menu from a fetch_firewalls result."""
         try:
-            api_url = f"https://{self.panorama_url}/api/?type=op&cmd=<show><devices><all></all></devices></show>&key={self.api_key}"
-            r = self._make_request(api_url, timeout=10)
-            xml_filename = os.path.join(WORK_DIR, "firewall_sync_log.xml")
-            with open(xml_filename, "w") as f:
-                f.write(r.text)
-            self._secure_file_permissions(xml_filename)
-            self.log(f"[Firewalls] Fetched successfully")
-            root = ET.fromstring(r.text)
-            entries = root.findall('.//entry')
-            if not entries:
+            if error is not None:
+                raise error
+            saw_entries, valid_entries = result
+            if not saw_entries:
                 self.firewalls_menu.clear()
                 self.firewalls_menu.add(rumps.MenuItem("No firewalls found"))
                 return
-            valid_entries = [
-                entry for entry in entries
-                if entry.findtext('hostname') not in (None, 'N/A') and
-                   entry.findtext('ip-address') not in (None, 'N/A') and
-                   entry.findtext('serial') not in (None, 'N/A')
-            ]
-            valid_entries.sort(key=lambda e: e.findtext('hostname'))
             self.firewalls_menu.clear()
             self.firewalls_menu.title = "Firewalls"
-            self._fw_items.clear(); self._fw_base.clear()
-            for entry in valid_entries:
-                hostname = entry.findtext('hostname')
-                mgmt_ip = entry.findtext('ip-address')
-                serial = entry.findtext('serial')
-                norm_serial = self._norm_serial(serial)
-
-                connected_field_candidates = [
-                    entry.findtext('connected'),
-                    entry.findtext('connection-status'),
-                    entry.findtext('connected-to-panorama'),
-                    entry.findtext('ha/peer/connected'),
-                ]
-                connected_raw = next((c for c in connected_field_candidates if c is not None), "")
+            self._fw_items.clear(); self._fw_base.clear(); self._fw_titles.clear(); self._fw_rows.clear()
+            custom_cmds = self._load_custom_commands()
+            for hostname, mgmt_ip, serial, connected_raw in valid_entries:
+                serial = self._norm_serial(serial)
                 val = str(connected_raw).strip().lower()
-                is_connected = val in ("yes", "true", "connected", "up", "1")
-                icon = "🟢" if is_connected else "🔴"
-
-                self._fw_base[norm_serial] = (icon, hostname)
-
-                item = rumps.MenuItem(f"{icon} {hostname}")
-                item.add(rumps.MenuItem(
-                    "Open in Browser",
-                    callback=lambda _, ip=mgmt_ip: webbrowser.open(f"https://{ip}")
-                ))
-                item.add(rumps.MenuItem(
-                    "Show System Info",
-                    callback=lambda _, ip=mgmt_ip, s=serial: self.fetch_system_info(ip, s)
-                ))
-                item.add(None)
-                item.add(rumps.MenuItem(
-                    "Check Local Overrides",
-                    callback=lambda _, s=serial: self._show_override_details(s)
-                ))
-                item.add(rumps.MenuItem(
-                    "Show Local Overrides",
-                    callback=lambda _, s=serial: self._show_override_details(s)
-                ))
-                item.add(None)
-                custom_menu = rumps.MenuItem("Custom Commands")
-                custom_menu.add(rumps.MenuItem(
-                    "Send Custom Command…",
-                    callback=lambda _, ip=mgmt_ip, s=serial: self.send_cli_command(ip, s)
-                ))
-                custom_menu.add(None)
-                for cc in self._load_custom_commands():
-                    lbl = cc.get('label') or cc.get('cmd')
-                    cmd = cc.get('cmd')
-                    custom_menu.add(rumps.MenuItem(lbl,
-                                                   callback=lambda _, s=serial, l=lbl, c=cmd: self._run_custom_command(s, l, c)))
-                custom_menu.add(None)
-                custom_menu.add(rumps.MenuItem("Add Custom Command", callback=self._add_custom_command_ui))
-                custom_menu.add(rumps.MenuItem("Delete Custom Command", callback=self._delete_custom_command_ui))
-                item.add(custom_menu)
-                item.add(None)
-                self._fw_items[norm_serial] = item
+                is_connected = val in _CONNECTED_TRUTHY
+                icon = _ICON_GREEN if is_connected else _ICON_RED
+
+                self._fw_base[serial] = (icon, hostname)
+
+                item = self._build_fw_item(hostname, mgmt_ip, serial, icon, custom_cmds)
+                self._fw_items[serial] = item
+                self._fw_titles[serial] = item.title
+                self._fw_rows.append((serial, icon, hostname, item))
                 self.firewalls_menu.add(item)
+            self._fw_rows.sort(key=lambda row: row[2].lower())
         except Exception as e:
             self.log(f"[Firewalls] Error: {e}")
             rumps.alert(f"Error fetching firewalls: {e}")
@@ -1762,81 +2182,39 @@ class PanoramaSyncMonitor(rumps.App):
         if not self.api_key or not self.panorama_url:
             rumps.alert("Please login first.")
             return
+        cmd = "<show><devices><connected></connected></devices></show>"
+        self._run_in_background(
+            lambda: self._request_device_entries(cmd, "firewall_connected_log.xml", "[Firewalls Connected]"),
+            self._apply_connected_firewalls,
+        )
+
+    def _apply_connected_firewalls(self, result, error):
+        """Main thread: rebuild the Firewalls menu from a fetch_connected_firewalls result."""
         try:
-            api_url = (
-                f"https://{self.panorama_url}/api/?type=op&cmd="
-                f"<show><devices><connected></connected></devices></show>&key={self.api_key}"
-            )
-            r = self._make_request(api_url, timeout=10)
-            xml_filename = os.path.join(WORK_DIR, "firewall_connected_log.xml")
-            with open(xml_filename, "w") as f:
-                f.write(r.text)
-            self._secure_file_permissions(xml_filename)
-            self.log(f"[Firewalls Connected] Fetched successfully")
-
-            root = ET.fromstring(r.text)
-            entries = root.findall('.//entry')
+            if error is not None:
+                raise error
+            saw_entries, valid_entries = result
             self.firewalls_menu.clear()
             self.firewalls_menu.title = "Firewalls (Connected)"
 
-            if not entries:
+            if not saw_entries:
                 self.firewalls_menu.add(rumps.MenuItem("No connected firewalls"))
                 return
 
-            valid_entries = [
-                entry for entry in entries
-                if entry.findtext('hostname') not in (None, 'N/A') and
-                   entry.findtext('ip-address') not in (None, 'N/A') and
-                   entry.findtext('serial') not in (None, 'N/A')
-            ]
-            valid_entries.sort(key=lambda e: e.findtext('hostname'))
-            self._fw_items.clear(); self._fw_base.clear()
-            for entry in valid_entries:
-                hostname = entry.findtext('hostname')
-                mgmt_ip = entry.findtext('ip-address')
-                serial = entry.findtext('serial')
-                norm_serial = self._norm_serial(serial)
-
-                icon = "🟢"
-                self._fw_base[norm_serial] = (icon, hostname)
-
-                item = rumps.MenuItem(f"{icon} {hostname}")
-                item.add(rumps.MenuItem(
-                    "Open in Browser",
-                    callback=lambda _, ip=mgmt_ip: webbrowser.open(f"https://{ip}")
-                ))
-                item.add(rumps.MenuItem(
-                    "Show System Info",
-                    callback=lambda _, ip=mgmt_ip, s=serial: self.fetch_system_info(ip, s)
-                ))
-                item.add(None)
-                item.add(rumps.MenuItem(
-                    "Check Local Overrides",
-                    callback=lambda _, s=serial: self._show_override_details(s)
-                ))
-                item.add(rumps.MenuItem(
-                    "Show Local Overrides",
-                    callback=lambda _, s=serial: self._show_override_details(s)
-                ))
-                item.add(None)
-                custom_menu = rumps.MenuItem("Custom Commands")
-                custom_menu.add(rumps.MenuItem(
-                    "Send Custom Command…",
-                    callback=lambda _, ip=mgmt_ip, s=serial: self.send_cli_command(ip, s)
-                ))
-                custom_menu.add(None)
-                for cc in self._load_custom_commands():
-                    lbl = cc.get('label') or cc.get('cmd')
-                    cmd = cc.get('cmd')
-                    custom_menu.add(rumps.MenuItem(lbl,
-                                                   callback=lambda _, s=serial, l=lbl, c=cmd: self._run_custom_command(s, l, c)))
-                custom_menu.add(None)
-                custom_menu.add(rumps.MenuItem("Add Custom Command", callback=self._add_custom_command_ui))
-                custom_menu.add(rumps.MenuItem("Delete Custom Command", callback=self._delete_custom_command_ui))
-                item.add(custom_menu)
-                item.add(None)
-                self._fw_items[norm_serial] = item
+            self._fw_items.clear(); self._fw_base.clear(); self._fw_titles.clear(); self._fw_rows.clear()
+            custom_cmds = self._load_custom_commands()
+            for hostname, mgmt_ip, serial, _connected in valid_entries:
+                serial = self._norm_serial(serial)
+
+                icon = _ICON_GREEN
+                self._fw_base[serial] = (icon, hostname)
+
+                item = self._build_fw_item(hostname, mgmt_ip, serial, icon, custom_cmds)
+                self._fw_items[serial] = item
+                self._fw_titles[serial] = item.title
+                self._fw_rows.append((serial, icon, hostname, item))
                 self.firewalls_menu.add(item)
+            self._fw_rows.sort(key=lambda row: row[2].lower())
         except Exception as e:
             self.log(f"[Firewalls Connected] Error: {e}")
             rumps.alert(f"Error fetching connected firewalls: {e}")
@@ -1855,16 +2233,17 @@ class PanoramaSyncMonitor(rumps.App):
         if not self.api_key or not self.panorama_url:
             rumps.alert("Please login first.")
             return
+        cmd = "<show><devicegroups></devicegroups></show>"
+        self._run_in_background(
+            lambda: self._request_entries(cmd, "device_group_sync_log.xml", "[Device Groups]"),
+            self._apply_device_groups,
+        )
+
+    def _apply_device_groups(self, entries, error):
+        """Main thread: rebuild the Device Groups menu from fetched <entry> elements."""
         try:
-            api_url = f"https://{self.panorama_url}/api/?type=op&cmd=<show><devicegroups></devicegroups></show>&key={self.api_key}"
-            r = self._make_request(api_url, timeout=10)
-            self.log(f"[Device Groups] Fetched successfully")
-            xml_filename = os.path.join(WORK_DIR, "device_group_sync_log.xml")
-            with open(xml_filename, "w") as f:
-                f.write(r.text)
-            self._secure_file_permissions(xml_filename)
-            root = ET.fromstring(r.text)
-            entries = root.findall('.//entry')
+            if error is not None:
+                raise error
             if not entries:
                 self.device_groups_menu.clear()
                 self.device_groups_menu.add(rumps.MenuItem("No device groups found"))
@@ -1878,30 +2257,26 @@ class PanoramaSyncMonitor(rumps.App):
                 multi_vsys = entry.findtext("multi-vsys") or "yes"
                 devices = entry.find("devices")
                 if devices is not None:
-                    for dev in devices.findall("entry"):
+                    for dev in devices.iterfind("entry"):
                         hostname = dev.findtext("hostname")
                         if not hostname:
                             continue
                         if hostname == "vsys1" and multi_vsys.lower() == "no":
                             continue
                         sync_status = dev.findtext("shared-policy-status") or "unknown"
-                        if sync_status.lower() == "in sync":
-                            icon = "🟢"
-                        elif sync_status.lower() == "out of sync":
-                            icon = "🔴"
-                        else:
-                            icon = "🟡"
-                        label = f"{icon} {hostname}: {sync_status}"
-                        item = rumps.MenuItem(label)
+                        icon = _SYNC_ICON.get(sync_status.lower(), _ICON_YELLOW)
+                        text = f"{hostname}: {sync_status}"
+                        item = rumps.MenuItem(f"{icon} {text}")
                         sync_item = rumps.MenuItem(
                             "Push to Device",
-                            callback=lambda _, dg=dg_name: self.sync_device_group_to_panorama(dg)
+                            callback=_menu_cb(self.sync_device_group_to_panorama, dg_name)
                         )
                         item.add(sync_item)
-                        items.append(item)
+                        items.append((text.lower(), item))
 
-            for item in sorted(items,
-                               key=lambda x: x.title.lower().replace("🟢 ", "").replace("🔴 ", "").replace("🟡 ", "")):
+            # Keys are captured at build time, so sorting never re-derives them from titles
+            items.sort(key=operator.itemgetter(0))
+            for _key, item in items:
                 self.device_groups_menu.add(item)
         except Exception as e:
             self.log(f"[Device Groups] Error: {e}")
@@ -1911,16 +2286,17 @@ class PanoramaSyncMonitor(rumps.App):
         if not self.api_key or not self.panorama_url:
             rumps.alert("Please login first.")
             return
+        cmd = "<show><templates></templates></show>"
+        self._run_in_background(
+            lambda: self._request_entries(cmd, "template_sync_log.xml", "[Templates]"),
+            self._apply_templates,
+        )
+
+    def _apply_templates(self, entries, error):
+        """Main thread: rebuild the Templates menu from fetched <entry> elements."""
         try:
-            api_url = f"https://{self.panorama_url}/api/?type=op&cmd=<show><templates></templates></show>&key={self.api_key}"
-            r = self._make_request(api_url, timeout=10)
-            self.log(f"[Templates] Fetched successfully")
-            xml_filename = os.path.join(WORK_DIR, "template_sync_log.xml")
-            with open(xml_filename, "w") as f:
-                f.write(r.text)
-            self._secure_file_permissions(xml_filename)
-            root = ET.fromstring(r.text)
-            entries = root.findall(".//entry")
+            if error is not None:
+                raise error
             if not entries:
                 self.templates_menu.clear()
                 self.templates_menu.add(rumps.MenuItem("No templates found"))
@@ -1935,40 +2311,30 @@ class PanoramaSyncMonitor(rumps.App):
                     if not hostname or hostname == "vsys1":
                         continue
                     sync_status = entry.findtext("template-status") or entry.findtext(".//template-status") or "unknown"
-                    if sync_status.lower() == "in sync":
-                        icon = "🟢"
-                    elif sync_status.lower() == "out of sync":
-                        icon = "🔴"
-                    else:
-                        icon = "🟡"
-                    label = f"{icon} {hostname}: {sync_status}"
-                    item = rumps.MenuItem(label)
+                    icon = _SYNC_ICON.get(sync_status.lower(), _ICON_YELLOW)
+                    text = f"{hostname}: {sync_status}"
+                    item = rumps.MenuItem(f"{icon} {text}")
                     sync_item = rumps.MenuItem("Push to Device",
-                                               callback=lambda _, h=hostname: self.push_template(h))
+                                               callback=_menu_cb(self.push_template, hostname))
                     item.add(sync_item)
-                    items.append(item)
+                    items.append((text.lower(), item))
                     continue
                 devices = entry.find("devices")
                 if devices is not None:
-                    for dev in devices.findall("entry"):
+                    for dev in devices.iterfind("entry"):
                         hostname = dev.findtext("hostname")
                         if not hostname or hostname == "vsys1":
                             continue
                         sync_status = dev.findtext("device-template-sync") or "unknown"
-                        if sync_status.lower() == "in sync":
-                            icon = "🟢"
-                        elif sync_status.lower() == "out of sync":
-                            icon = "🔴"
-                        else:
-                            icon = "🟡"
-                        label = f"{icon} {hostname}: {sync_status}"
-                        item = rumps.MenuItem(label)
+                        icon = _SYNC_ICON.get(sync_status.lower(), _ICON_YELLOW)
+                        text = f"{hostname}: {sync_status}"
+                        item = rumps.MenuItem(f"{icon} {text}")
                         sync_item = rumps.MenuItem("Push to Device",
-                                                   callback=lambda _, h=hostname: self.push_template(h))
+                                                   callback=_menu_cb(self.push_template, hostname))
                         item.add(sync_item)
-                        items.append(item)
-            items.sort(key=lambda x: x.title.lower().replace("🟢 ", "").replace("🔴 ", "").replace("🟡 ", ""))
-            for item in items:
+                        items.append((text.lower(), item))
+            items.sort(key=operator.itemgetter(0))
+            for _key, item in items:
                 self.templates_menu.add(item)
         except Exception as e:
             self.log(f"[Templates] Error: {e}")
@@ -1982,48 +2348,58 @@ class PanoramaSyncMonitor(rumps.App):
         if not self.api_key:
             rumps.alert("Please login first.")
             return
-        try:
-            cmd = "<show><system><info></info></system></show>"
-            url = f"https://{self.panorama_url}/api/?type=op&target={serial}&cmd={cmd}&key={self.api_key}"
-            r = self._make_request(url, timeout=15)
+        self._run_in_background(
+            lambda: self._request_system_info(serial),
+            lambda tabs, error: self._show_system_info(ip, tabs, error),
+        )
 
-            raw_text = r.text or ""
-            try:
-                import xml.dom.minidom as minidom
-                dom = minidom.parseString(raw_text)
-                pretty_xml = dom.toprettyxml(indent="  ")
-                pretty_lines = [line for line in pretty_xml.splitlines() if line.strip()]
-                raw_pretty = "\n".join(pretty_lines)
-            except Exception:
-                raw_pretty = raw_text
+    def _request_system_info(self, serial):
+        """Worker: fetch show system info and return the Raw / Human Readable tabs."""
+        cmd = "<show><system><info></info></system></show>"
+        r = self._api_get({"type": "op", "cmd": cmd, "target": serial}, timeout=15)
 
-            try:
-                root = ET.fromstring(r.text)
-                sysinfo = root.find(".//result/system")
-            except Exception:
-                sysinfo = None
-
-            if sysinfo is not None:
-                vals = lambda tag: (sysinfo.findtext(tag) or "N/A").strip()
-                output_lines = [
-                    f"{'Hostname:':15} {vals('hostname')}",
-                    f"{'IP Address:':15} {vals('ip-address')}",
-                    f"{'Default Gateway:':15} {vals('default-gateway')}",
-                    f"{'Netmask:':15} {vals('netmask')}",
-                    f"{'DHCP Enabled:':15} {vals('is-dhcp')}",
-                    f"{'IPv6 Address:':15} {vals('ipv6-address')}",
-                    f"{'IPv6 Link Local:':15} {vals('ipv6-link-local-address')}",
-                    f"{'MAC Address:':15} {vals('mac-address')}",
-                    f"{'Model:':15} {vals('model')}",
-                    f"{'SW Version:':15} {vals('sw-version')}",
-                    f"{'Serial:':15} {vals('serial')}",
-                    f"{'Uptime:':15} {vals('uptime')}",
-                ]
-                human_text = "\n".join(output_lines)
+        # One parse feeds both tabs: the pretty Raw text and the field extraction
+        try:
+            if LXML_AVAILABLE:
+                parser = LET.XMLParser(remove_blank_text=True, resolve_entities=False, no_network=True)
+                root = LET.fromstring(r.content, parser)
+                raw_pretty = LET.tostring(root, pretty_print=True, encoding="unicode")
             else:
-                human_text = "Unable to parse system info. See Raw tab."
+                root = ET.fromstring(r.content)
+                ET.indent(root, space="  ")
+                raw_pretty = ET.tostring(root, encoding="unicode")
+            sysinfo = _xml_system(root)
+        except Exception:
+            raw_pretty = r.text or ""
+            sysinfo = None
+
+        if sysinfo is not None:
+            vals = lambda tag: (sysinfo.findtext(tag) or "N/A").strip()
+            output_lines = [
+                f"{'Hostname:':15} {vals('hostname')}",
+                f"{'IP Address:':15} {vals('ip-address')}",
+                f"{'Default Gateway:':15} {vals('default-gateway')}",
+                f"{'Netmask:':15} {vals('netmask')}",
+                f"{'DHCP Enabled:':15} {vals('is-dhcp')}",
+                f"{'IPv6 Address:':15} {vals('ipv6-address')}",
+                f"{'IPv6 Link Local:':15} {vals('ipv6-link-local-address')}",
+                f"{'MAC Address:':15} {vals('mac-address')}",
+                f"{'Model:':15} {vals('model')}",
+                f"{'SW Version:':15} {vals('sw-version')}",
+                f"{'Serial:':15} {vals('serial')}",
+                f"{'Uptime:':15} {vals('uptime')}",
+            ]
+            human_text = "\n".join(output_lines)
+        else:
+            human_text = "Unable to parse system info. See Raw tab."
+
+        return [("Raw", raw_pretty), ("Human Readable", human_text)]
 
-            tabs = [("Raw", raw_pretty), ("Human Readable", human_text)]
+    def _show_system_info(self, ip, tabs, error):
+        """Main thread: show the System Info popup, or the error from the worker."""
+        try:
+            if error is not None:
+                raise error
             self._show_tabbed_alert("System Info", tabs, width=760, height=420)
 
             self.log(f"[System Info for {ip}] Retrieved successfully")
@@ -2033,134 +2409,82 @@ class PanoramaSyncMonitor(rumps.App):
             self._show_monospaced_alert("System Info Error", f"Error: {e}")
 
     def _cli_show_to_xml(self, cmd: str) -> Optional[str]:
-        """Convert plain CLI 'show ...' into nested op-XML with a self-closing leaf."""
-        try:
-            parts = [p for p in (cmd or '').strip().split() if p]
-            if not parts or parts[0].lower() != 'show':
-                return None
-            tokens = parts[1:]
-            if not tokens:
-                return '<show/>'
-            xml = ['<show>']
-            for t in tokens[:-1]:
-                xml.append(f'<{t}>')
-            xml.append(f'<{tokens[-1]}/>')
-            for t in reversed(tokens[:-1]):
-                xml.append(f'</{t}>')
-            xml.append('</show>')
-            return ''.join(xml)
-        except Exception:
-            return None
+        """Convert plain CLI 'show ...' into nested op-XML with a self-closing leaf.
 
-    def _execute_cli_command(self, serial: str, cli_cmd: str, popup_title: str = "CLI Output"):
-        if not self.api_key:
-            rumps.alert("Please login first.")
-            return
+        Returns None unless every token is a plain word (see _TOKEN_RE)."""
+        parts = (cmd or '').split()
+        if not parts or parts[0].lower() != 'show':
+            return None
+        tokens = parts[1:]
+        if not tokens:
+            return '<show/>'
+        if not all(_TOKEN_RE.fullmatch(t) for t in tokens):
+            return None
+        inner = tokens[:-1]
+        open_tags = ''.join(f'<{t}>' for t in inner)
+        close_tags = ''.join(f'</{t}>' for t in reversed(inner))
+        return f'<show>{open_tags}<{tokens[-1]}/>{close_tags}</show>'
 
+    def _prepare_cli(self, cli_cmd: str, popup_title: str):
+        """Resolve a CLI string to (op XML, humanizer or None, popup title); no I/O."""
         cmd = (cli_cmd or "").strip()
-        cmd_lower = cmd.lower()
-
-        xml_cmd = None
-        humanizer = None
-
-        if cmd.startswith("<") and cmd.endswith(">"):
-            xml_text = self.run_op_cmd(serial, cmd)
-            raw_pretty = self._pretty_xml(xml_text)
-            human_text = self._humanize_generic_xml(xml_text)
-            self._show_tabbed_alert(popup_title, [("Raw", raw_pretty), ("Human Readable", human_text)], width=760, height=420)
-            return
-
-        if cmd_lower == "show interface all":
-            xml_cmd = "<show><interface>all</interface></show>"
-            def _human_if(xml_text: str):
-                try:
-                    root = ET.fromstring(xml_text)
-                    result_elem = root.find('.//result')
-                    hw_section = result_elem.find('hw') if result_elem is not None else None
-                    if hw_section is None:
-                        return "(No human-readable formatter for this command)\nSee Raw tab."
-                    rows = []
-                    for entry in hw_section.findall('entry'):
-                        parts = []
-                        for child in entry:
-                            key = child.tag.strip(); val = (child.text or '').strip()
-                            parts.append(f"{key}: {val}")
-                        rows.append(" | ".join(parts))
-                    return "\n".join(rows) if rows else "No entries."
-                except Exception:
-                    return "(No human-readable formatter for this command)\nSee Raw tab."
-            humanizer = _human_if
-
-        elif cmd_lower == "show arp all":
-            xml_cmd = "<show><arp><entry name='all'/></arp></show>"
-            def _human_arp(xml_text: str):
-                try:
-                    root = ET.fromstring(xml_text)
-                    result_elem = root.find('.//result')
-                    entries = []
-                    if result_elem is not None:
-                        entries_section = result_elem.find('entries')
-                        entries = entries_section.findall('entry') if entries_section is not None else []
-                    rows = []
-                    for e in entries:
-                        parts = []
-                        for child in e:
-                            key = child.tag.strip(); val = (child.text or '').strip()
-                            parts.append(f"{key}: {val}")
-                        rows.append(" | ".join(parts))
-                    return "\n".join(rows) if rows else "No ARP entries."
-                except Exception:
-                    return "(No human-readable formatter for this command)\nSee Raw tab."
-            humanizer = _human_arp
-
-        elif cmd_lower.startswith("show "):
-            xml_cmd = self._cli_show_to_xml(cmd)
-            if xml_cmd:
-                xml_text = self.run_op_cmd(serial, xml_cmd)
-                raw_pretty = self._pretty_xml(xml_text)
-                human_text = self._humanize_generic_xml(xml_text)
-                self._show_tabbed_alert(popup_title, [("Raw", raw_pretty), ("Human Readable", human_text)], width=760, height=420)
-                return
-
-        elif cmd_lower in ("show vpn ike-sa", "show vpn ike sa", "show ike gw", "show ike gateway"):
-            xml_cmd = "<show><vpn><ike-sa></ike-sa></vpn></show>"
-            humanizer = self._humanize_ike_summary
-
-        elif cmd_lower in ("show vpn ipsec-sa", "show vpn ipsec sa", "show ipsec tunnel", "show ipsec tunnels"):
-            xml_cmd = "<show><vpn><ipsec-sa></ipsec-sa></vpn></show>"
-            humanizer = self._humanize_ipsec_summary
-
-        elif cmd_lower in ("show routing protocol bgp summary", "show bgp summary"):
-            xml_cmd = "<show><routing><protocol><bgp><summary></summary></bgp></protocol></routing></show>"
-            humanizer = None
-
-        else:
-            plaintext = cmd
-            xml_wrapped = f"<request><cli><raw>{plaintext}</raw></cli></request>"
-            xml_text = self.run_op_cmd(serial, xml_wrapped)
-            raw_pretty = self._pretty_xml(xml_text)
-            human_text = self._humanize_generic_xml(xml_text)
-            self._show_tabbed_alert(popup_title + " (raw)", [("Raw", raw_pretty), ("Human Readable", human_text)], width=760, height=420)
-            return
-
-        xml_text = self.run_op_cmd(serial, xml_cmd)
-        raw_pretty = self._pretty_xml(xml_text)
-
+        if cmd[:1] == "<" and cmd[-1:] == ">":
+            return cmd, None, popup_title
+        known = self._cli_dispatch.get(cmd.lower())
+        if known is not None:
+            return known[0], known[1], popup_title
+        xml_cmd = self._cli_show_to_xml(cmd) if cmd.lower().startswith("show ") else None
+        if xml_cmd:
+            return xml_cmd, None, popup_title
+        return f"<request><cli><raw>{escape(cmd)}</raw></cli></request>", None, popup_title + " (raw)"
+
+    def _run_cli(self, serial: str, xml_cmd: str, humanizer):
+        """Worker: run an op command and build the Raw / Human Readable tabs."""
+        xml_text = self.run_op_cmd(serial, xml_cmd, as_bytes=True)
+        raw_pretty = functools.partial(self._pretty_xml, xml_text)  # formatted only if the Raw tab is opened
         try:
             human_text = (humanizer(xml_text) if humanizer else None)
         except Exception:
             human_text = None
         if not human_text:
             human_text = self._humanize_generic_xml(xml_text)
+        return [("Raw", raw_pretty), ("Human Readable", human_text)]
+
+    def _show_cli_result(self, popup_title: str, tabs, error, ip=None, then=None):
+        """Main thread: present a finished _run_cli result, then call then() once it is dismissed."""
+        if error is not None:
+            if ip is not None:
+                self.log(f"[CLI Output for {ip}] Command failed: {error}")
+            self._show_monospaced_alert("CLI Error", f"{popup_title}: {error}")
+        else:
+            if ip is not None:
+                self.log(f"[CLI Output for {ip}] Command executed")
+            self._show_tabbed_alert(popup_title, tabs, width=760, height=420)
+        if then is not None:
+            then()
+
+    def _execute_cli_command(self, serial: str, cli_cmd: str, popup_title: str = "CLI Output", ip=None, then=None):
+        """Run a CLI or op-XML command in the background; the popup opens when it returns."""
+        if not self.api_key:
+            rumps.alert("Please login first.")
+            return
 
-        self._show_tabbed_alert(popup_title, [("Raw", raw_pretty), ("Human Readable", human_text)], width=760, height=420)
+        xml_cmd, humanizer, title = self._prepare_cli(cli_cmd, popup_title)
+        self._run_in_background(
+            lambda: self._run_cli(serial, xml_cmd, humanizer),
+            lambda tabs, error: self._show_cli_result(title, tabs, error, ip, then),
+        )
 
     def send_cli_command(self, ip, serial):
-        """Firewall CLI runner using an NSAlert."""
+        """Firewall CLI runner using an NSAlert.
+
+        The prompt reopens once the command's result popup is dismissed, so the two never stack."""
         if not self.api_key:
             rumps.alert("Please login first.")
             return
 
+        reopen = functools.partial(self.send_cli_command, ip, serial)
+
         preset_cmds = [
             "show interface all",
             "show arp all",
@@ -2170,19 +2494,13 @@ class PanoramaSyncMonitor(rumps.App):
 
         while True:
             try:
-                from AppKit import (
-                    NSApp, NSAlert, NSView, NSMakeRect, NSTextField,
-                    NSPopUpButton, NSImage
-                )
-
                 alert = NSAlert.alloc().init()
                 alert.setMessageText_("Firewall CLI")
                 alert.setInformativeText_("Choose a preset or enter a CLI/op-XML command. If both are provided, the text field is used.")
 
-                if os.path.exists(ICON_PATH):
-                    icon_image = NSImage.alloc().initWithContentsOfFile_(ICON_PATH)
-                    if icon_image:
-                        alert.setIcon_(icon_image)
+                icon_image = self._icon_image()
+                if icon_image:
+                    alert.setIcon_(icon_image)
 
                 view = NSView.alloc().initWithFrame_(NSMakeRect(0, 0, 500, 74))
 
@@ -2219,20 +2537,19 @@ class PanoramaSyncMonitor(rumps.App):
                     else:
                         break
 
-                if cli_cmd.lstrip().startswith("<") and cli_cmd.rstrip().endswith(">"):
+                if cli_cmd[:1] == "<" and cli_cmd[-1:] == ">":
                     try:
-                        xml_text = self.run_op_cmd(serial, cli_cmd)
-                        raw_pretty = self._pretty_xml(xml_text)
-                        human_text = self._humanize_generic_xml(xml_text)
-                        self._show_tabbed_alert(f"CLI (op-XML): {cli_cmd[:60]}...", [("Raw", raw_pretty), ("Human Readable", human_text)], width=760, height=420)
-                        self.log(f"[CLI Output for {ip}] (op-XML)")
+                        self._execute_cli_command(
+                            serial, cli_cmd, popup_title=f"CLI (op-XML): {cli_cmd[:60]}...", ip=ip, then=reopen
+                        )
+                        return
                     except Exception as e:
                         self._show_monospaced_alert("CLI Error (op-XML)", f"{e}")
                     continue
 
                 try:
-                    self._execute_cli_command(serial, cli_cmd, popup_title=f"CLI: {cli_cmd}")
-                    self.log(f"[CLI Output for {ip}] Command executed")
+                    self._execute_cli_command(serial, cli_cmd, popup_title=f"CLI: {cli_cmd}", ip=ip, then=reopen)
+                    return
                 except Exception as e:
                     self._show_monospaced_alert("CLI Error", f"{cli_cmd}: {e}")
 
@@ -2250,32 +2567,22 @@ class PanoramaSyncMonitor(rumps.App):
                 val = (res.text or "").strip()
                 if not val:
                     break
-                if val.isdigit():
+                try:
                     idx = int(val) - 1
-                    if 0 <= idx < len(preset_cmds):
-                        cli_cmd = preset_cmds[idx]
-                    else:
-                        cli_cmd = val
-                else:
+                    cli_cmd = preset_cmds[idx] if 0 <= idx < len(preset_cmds) else val
+                except ValueError:
                     cli_cmd = val
                 try:
-                    if cli_cmd.lstrip().startswith("<") and cli_cmd.rstrip().endswith(">"):
-                        xml_text = self.run_op_cmd(serial, cli_cmd)
-                        raw_pretty = self._pretty_xml(xml_text)
-                        human_text = self._humanize_generic_xml(xml_text)
-                        self._show_tabbed_alert(f"CLI (op-XML): {cli_cmd[:60]}...", [("Raw", raw_pretty), ("Human Readable", human_text)], width=760, height=420)
-                        self.log(f"[CLI Output for {ip}] (op-XML)")
+                    if cli_cmd[:1] == "<" and cli_cmd[-1:] == ">":
+                        title = f"CLI (op-XML): {cli_cmd[:60]}..."
                     else:
-                        self._execute_cli_command(serial, cli_cmd, popup_title=f"CLI: {cli_cmd}")
-                        self.log(f"[CLI Output for {ip}] Command executed")
+                        title = f"CLI: {cli_cmd}"
+                    self._execute_cli_command(serial, cli_cmd, popup_title=title, ip=ip, then=reopen)
+                    return
                 except Exception as ex:
                     self._show_monospaced_alert("CLI Error", f"{cli_cmd}: {ex}")
                 continue
 
-    def _url_x(self, xpath):
-        from urllib.parse import quote
-        return quote(xpath, safe="/[]@'=:-")
-
     def sync_device_group_to_panorama(self, device_group_name):
         """Push Device Group policies using the correct Panorama op API and XML structure."""
         if not self.api_key:
@@ -2291,25 +2598,40 @@ class PanoramaSyncMonitor(rumps.App):
         if response != 1:
             return
 
-        try:
-            from urllib.parse import quote
-            xml_cmd = (
-                f"<commit-all><shared-policy>"
-                f"<device-group><entry name='{device_group_name}'/></device-group>"
-                f"</shared-policy></commit-all>"
-            )
-            url = (
-                f"https://{self.panorama_url}/api/?type=commit&action=all"
-                f"&key={self.api_key}&cmd={quote(xml_cmd)}"
-            )
-            self.log(f"[Device Group Push] Initiating push")
-            r = self._make_request(url, timeout=30)
-            self.log(f"[Device Group Push] Response received")
+        xml_cmd = (
+            f"<commit-all><shared-policy>"
+            f"<device-group><entry name={quoteattr(device_group_name)}/></device-group>"
+            f"</shared-policy></commit-all>"
+        )
+        self._run_in_background(
+            lambda: self._request_commit(xml_cmd, "[Device Group Push]"),
+            lambda result, error: self._apply_device_group_push(device_group_name, result, error),
+        )
 
-            root = ET.fromstring(r.text)
-            status = root.get("status", "unknown")
-            job_id = root.findtext(".//job")
-            msg = root.findtext(".//msg") or root.findtext(".//line") or ""
+    def _request_commit(self, xml_cmd, tag):
+        """Worker: submit a commit-all and return (status, job_id, msg) from the response."""
+        self.log(f"{tag} Initiating push")
+        r = self._api_get({"type": "commit", "action": "all", "cmd": xml_cmd}, timeout=30)
+        self.log(f"{tag} Response received")
+
+        root = self._parse_xml(r.content)
+        # First job/msg/line in document order, from a single walk
+        found = {"job": None, "msg": None, "line": None}
+        missing = 3
+        for elem in root.iter():
+            if elem.tag in found and found[elem.tag] is None:
+                found[elem.tag] = elem.text or ""
+                missing -= 1
+                if not missing:
+                    break
+        return root.get("status", "unknown"), found["job"], found["msg"] or found["line"] or ""
+
+    def _apply_device_group_push(self, device_group_name, result, error):
+        """Main thread: report a finished device-group commit."""
+        try:
+            if error is not None:
+                raise error
+            status, job_id, msg = result
 
             if status == "success" and job_id:
                 output = (
@@ -2317,18 +2639,7 @@ class PanoramaSyncMonitor(rumps.App):
                     f"Job ID: {job_id}\n\n"
                     f"Check Panorama Task Manager for progress."
                 )
-                try:
-                    from AppKit import NSAlert, NSImage, NSApp
-                    alert = NSAlert.alloc().init()
-                    alert.setMessageText_(f"Device Group Push — {device_group_name}")
-                    alert.setInformativeText_(output)
-                    if os.path.exists(ICON_PATH):
-                        icon_image = NSImage.alloc().initWithContentsOfFile_(ICON_PATH)
-                        if icon_image:
-                            alert.setIcon_(icon_image)
-                    NSApp.activateIgnoringOtherApps_(True)
-                    alert.runModal()
-                except Exception:
+                if not self._show_native_alert(f"Device Group Push — {device_group_name}", output):
                     rumps.alert(output)
                 rumps.notification("Panorama Sync", "Device Group Push", f"Job {job_id} for '{device_group_name}' started")
                 return
@@ -2347,26 +2658,23 @@ class PanoramaSyncMonitor(rumps.App):
             rumps.alert("Please login first.")
             return
 
-        try:
-            from urllib.parse import quote
-            stack_name = f"{template_name}_stack"
-            xml_cmd = (
-                f"<commit-all><template-stack>"
-                f"<name>{stack_name}</name>"
-                f"</template-stack></commit-all>"
-            )
-            url = (
-                f"https://{self.panorama_url}/api/?type=commit&action=all"
-                f"&key={self.api_key}&cmd={quote(xml_cmd)}"
-            )
-            self.log(f"[Template Push] Initiating push")
-            r = self._make_request(url, timeout=30)
-            self.log(f"[Template Push] Response received")
+        stack_name = f"{template_name}_stack"
+        xml_cmd = (
+            f"<commit-all><template-stack>"
+            f"<name>{escape(stack_name)}</name>"
+            f"</template-stack></commit-all>"
+        )
+        self._run_in_background(
+            lambda: self._request_commit(xml_cmd, "[Template Push]"),
+            lambda result, error: self._apply_template_push(template_name, stack_name, result, error),
+        )
 
-            root = ET.fromstring(r.text)
-            status = root.get("status", "unknown")
-            job_id = root.findtext(".//job")
-            msg = root.findtext(".//msg") or root.findtext(".//line") or ""
+    def _apply_template_push(self, template_name, stack_name, result, error):
+        """Main thread: report a finished template-stack commit."""
+        try:
+            if error is not None:
+                raise error
+            status, job_id, msg = result
 
             if status == "success" and job_id:
                 output = (
@@ -2374,18 +2682,7 @@ class PanoramaSyncMonitor(rumps.App):
                     f"Job ID: {job_id}\n\n"
                     f"Check Panorama Task Manager for progress."
                 )
-                try:
-                    from AppKit import NSAlert, NSImage, NSApp
-                    alert = NSAlert.alloc().init()
-                    alert.setMessageText_(f"Template Push — {template_name}")
-                    alert.setInformativeText_(output)
-                    if os.path.exists(ICON_PATH):
-                        icon_image = NSImage.alloc().initWithContentsOfFile_(ICON_PATH)
-                        if icon_image:
-                            alert.setIcon_(icon_image)
-                    NSApp.activateIgnoringOtherApps_(True)
-                    alert.runModal()
-                except Exception:
+                if not self._show_native_alert(f"Template Push — {template_name}", output):
                     rumps.alert(output)
                 rumps.notification("Panorama Sync", "Template Push", f"Job {job_id} for '{template_name}' started")
                 return
@@ -2398,10 +2695,5 @@ class PanoramaSyncMonitor(rumps.App):
             self.log(f"[Template Push] Exception: {e}")
             rumps.alert(f"Error pushing template '{template_name}': {e}")
 
-
 if __name__ == "__main__":
-    import urllib3
-    urllib3.disable_warnings()
-    warnings.filterwarnings("ignore", category=InsecureRequestWarning)
-    warnings.filterwarnings("ignore", category=NotOpenSSLWarning)
     PanoramaSyncMonitor().run()